@@ -1,6 +1,7 @@
 """
 实体类型管理模块
 """
+import sys
 from typing import Dict, List, Any
 from dataclasses import dataclass
 
@@ -32,9 +33,7 @@ class EntityTypes:
         self.entities[entity.id] = entity
         
         # 更新类型索引
-        if entity.type not in self.type_index:
-            self.type_index[entity.type] = []
-        self.type_index[entity.type].append(entity.id)
+        self.type_index.setdefault(entity.type, []).append(entity.id)
         
         # 更新名称索引
         self.name_index[entity.name] = entity.id
@@ -79,28 +78,26 @@ class EntityTypes:
     
     def update_entity_property(self, entity_id: str, property_name: str, value: Any):
         """更新实体属性"""
-        if entity_id in self.entities:
-            self.entities[entity_id].properties[property_name] = value
+        entity = self.entities.get(entity_id)
+        if entity is not None:
+            entity.properties[property_name] = value
     
     def delete_entity(self, entity_id: str):
         """删除实体"""
-        if entity_id not in self.entities:
+        # 删除实体
+        entity = self.entities.pop(entity_id, None)
+        if entity is None:
             return
         
-        entity = self.entities[entity_id]
-        
         # 从类型索引中移除
-        if entity.type in self.type_index:
-            self.type_index[entity.type].remove(entity_id)
+        type_entity_ids = self.type_index.get(entity.type)
+        if type_entity_ids is not None:
+            type_entity_ids.remove(entity_id)
         
         # 从名称索引中移除
         del self.name_index[entity.name]
         for alias in entity.aliases:
-            if alias in self.name_index:
-                del self.name_index[alias]
-        
-        # 删除实体
-        del self.entities[entity_id]
+            self.name_index.pop(alias, None)
     
     def get_statistics(self) -> Dict[str, int]:
         """获取统计信息"""
@@ -117,7 +114,9 @@ class EntityTypes:
     def print_statistics(self):
         """打印统计信息"""
         stats = self.get_statistics()
-        print(f"总实体数: {stats['total_entities']}")
-        print("按类型分布:")
-        for entity_type, count in stats["by_type"].items():
-            print(f"  {entity_type}: {count}")
\ No newline at end of file
+        lines = [f"总实体数: {stats['total_entities']}", "按类型分布:"]
+        lines.extend(f"  {entity_type}: {count}"
+                     for entity_type, count in stats["by_type"].items())
+        
+        # 一次性写出，避免逐行print
+        sys.stdout.write("\n".join(lines) + "\n")
\ No newline at end of file
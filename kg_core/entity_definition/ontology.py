@@ -1,9 +1,12 @@
 """
 本体定义模块 - 定义知识图谱的本体结构
 """
-from typing import Dict, List, Set
+from typing import Dict, List, Set, Tuple, Optional
 from dataclasses import dataclass
-import json
+from collections import defaultdict
+import sys
+
+from ..utils.serialization import dumps_json, loads_json
 
 
 @dataclass
@@ -31,6 +34,8 @@ class Ontology:
     def __init__(self):
         self.entity_types: Dict[str, EntityType] = {}
         self.relation_types: Dict[str, RelationType] = {}
+        # (头实体类型, 尾实体类型) -> 可能的关系名，按需构建，关系类型变化时失效
+        self._pair_index: Optional[Dict[Tuple[str, str], Tuple[str, ...]]] = None
         self.initialize_default_ontology()
     
     def initialize_default_ontology(self):
@@ -69,11 +74,14 @@ class Ontology:
     
     def add_entity_type(self, entity_type: EntityType):
         """添加实体类型"""
+        entity_type.name = sys.intern(entity_type.name)
         self.entity_types[entity_type.name] = entity_type
     
     def add_relation_type(self, relation_type: RelationType):
         """添加关系类型"""
+        relation_type.name = sys.intern(relation_type.name)
         self.relation_types[relation_type.name] = relation_type
+        self._pair_index = None
     
     def get_entity_type(self, name: str) -> EntityType:
         """获取实体类型"""
@@ -94,11 +102,13 @@ class Ontology:
     
     def get_possible_relations(self, head_type: str, tail_type: str) -> List[str]:
         """获取两个实体类型之间可能的关系"""
-        possible_relations = []
-        for rel_name, rel_type in self.relation_types.items():
-            if rel_type.domain == head_type and rel_type.range == tail_type:
-                possible_relations.append(rel_name)
-        return possible_relations
+        if self._pair_index is None:
+            pair_index = defaultdict(list)
+            for rel_name, rel_type in self.relation_types.items():
+                pair_index[(rel_type.domain, rel_type.range)].append(rel_name)
+            self._pair_index = {pair: tuple(names) for pair, names in pair_index.items()}
+        
+        return list(self._pair_index.get((head_type, tail_type), ()))
     
     def export_ontology(self, filepath: str):
         """导出本体到JSON文件"""
@@ -122,13 +132,13 @@ class Ontology:
             }
         }
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(ontology_data, f, ensure_ascii=False, indent=2)
+        with open(filepath, 'wb') as f:
+            f.write(dumps_json(ontology_data))
     
     def load_ontology(self, filepath: str):
         """从JSON文件加载本体"""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            ontology_data = json.load(f)
+        with open(filepath, 'rb') as f:
+            ontology_data = loads_json(f.read())
         
         # 加载实体类型
         for name, data in ontology_data.get("entity_types", {}).items():
@@ -153,11 +163,14 @@ class Ontology:
     
     def print_ontology_summary(self):
         """打印本体摘要"""
-        print("=== 知识图谱本体摘要 ===")
-        print(f"\n实体类型 ({len(self.entity_types)}):")
-        for name, entity_type in self.entity_types.items():
-            print(f"  - {name}: {entity_type.description}")
+        lines = ["=== 知识图谱本体摘要 ===",
+                 f"\n实体类型 ({len(self.entity_types)}):"]
+        lines.extend(f"  - {name}: {entity_type.description}"
+                     for name, entity_type in self.entity_types.items())
+        
+        lines.append(f"\n关系类型 ({len(self.relation_types)}):")
+        lines.extend(f"  - {name}: {relation_type.domain} -> {relation_type.range}"
+                     for name, relation_type in self.relation_types.items())
         
-        print(f"\n关系类型 ({len(self.relation_types)}):")
-        for name, relation_type in self.relation_types.items():
-            print(f"  - {name}: {relation_type.domain} -> {relation_type.range}")
\ No newline at end of file
+        # 一次性写出，避免逐行print
+        sys.stdout.write("\n".join(lines) + "\n")
\ No newline at end of file
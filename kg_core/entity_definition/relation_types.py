@@ -1,8 +1,17 @@
 """
 关系类型管理模块
 """
-from typing import Dict, List, Any, Tuple
+import sys
+from typing import Dict, List, Any, Tuple, Iterable
 from dataclasses import dataclass
+from collections import defaultdict
+import numpy as np
+
+try:
+    # 可选依赖：用于JIT编译CSR图上的路径搜索
+    from numba import njit
+except ImportError:
+    njit = None
 
 
 @dataclass
@@ -16,35 +25,148 @@ class Relation:
     confidence: float = 1.0
 
 
+def _intern_relation_keys(relation: Relation):
+    """驻留关系的类型和实体ID字符串，重复出现的索引键可按指针快速比较"""
+    relation.type = sys.intern(relation.type)
+    relation.head_entity_id = sys.intern(relation.head_entity_id)
+    relation.tail_entity_id = sys.intern(relation.tail_entity_id)
+
+
+def _find_paths_csr_kernel(indptr, tails, start, end, max_depth):
+    """CSR图上的迭代DFS，返回(扁平化的路径边序号, 每条路径的起始偏移)"""
+    nodes = np.empty(max_depth + 1, dtype=np.int64)
+    cursors = np.empty(max_depth + 1, dtype=np.int64)
+    edges = np.empty(max_depth + 1, dtype=np.int64)
+    path_edges = np.empty(64, dtype=np.int64)
+    path_offsets = np.empty(16, dtype=np.int64)
+    path_offsets[0] = 0
+    n_edges = 0
+    n_paths = 0
+    
+    depth = 0
+    nodes[0] = start
+    cursors[0] = indptr[start]
+    while depth >= 0:
+        node = nodes[depth]
+        if cursors[depth] >= indptr[node + 1]:
+            depth -= 1
+            continue
+        
+        edge = cursors[depth]
+        cursors[depth] += 1
+        edges[depth] = edge
+        child = tails[edge]
+        
+        if child == end:
+            # 记录路径 edges[0..depth]
+            while n_edges + depth + 1 > path_edges.shape[0]:
+                grown = np.empty(path_edges.shape[0] * 2, dtype=np.int64)
+                grown[:n_edges] = path_edges[:n_edges]
+                path_edges = grown
+            if n_paths + 2 > path_offsets.shape[0]:
+                grown = np.empty(path_offsets.shape[0] * 2, dtype=np.int64)
+                grown[:n_paths + 1] = path_offsets[:n_paths + 1]
+                path_offsets = grown
+            for i in range(depth + 1):
+                path_edges[n_edges] = edges[i]
+                n_edges += 1
+            n_paths += 1
+            path_offsets[n_paths] = n_edges
+            continue
+        
+        if depth + 1 >= max_depth:
+            continue
+        
+        on_path = False
+        for i in range(depth + 1):
+            if nodes[i] == child:
+                on_path = True
+                break
+        if on_path:
+            continue
+        
+        depth += 1
+        nodes[depth] = child
+        cursors[depth] = indptr[child]
+    
+    return path_edges[:n_edges], path_offsets[:n_paths + 1]
+
+
+_find_paths_csr = njit(cache=True)(_find_paths_csr_kernel) if njit is not None else None
+
+
 class RelationTypes:
     """关系类型管理器"""
     
     def __init__(self):
         self.relations: Dict[str, Relation] = {}
-        self.type_index: Dict[str, List[str]] = {}  # 按关系类型索引
-        self.entity_index: Dict[str, List[str]] = {}  # 按实体索引关系
-        self.head_tail_index: Dict[Tuple[str, str], List[str]] = {}  # 按头尾实体索引
+        # 索引值使用保持插入顺序的dict作为有序集合，删除为O(1)
+        self.type_index: Dict[str, Dict[str, None]] = {}  # 按关系类型索引
+        self.entity_index: Dict[str, Dict[str, None]] = {}  # 按实体索引关系
+        self.head_tail_index: Dict[Tuple[str, str], Dict[str, None]] = {}  # 按头尾实体索引
+        self.out_adj: Dict[str, Dict[str, None]] = {}  # 按头实体索引出边
+        self.in_adj: Dict[str, Dict[str, None]] = {}  # 按尾实体索引入边
+        # 出边的CSR表示，关系变化后在下次路径搜索时重建
+        self._csr = None
     
     def add_relation(self, relation: Relation):
         """添加关系"""
-        self.relations[relation.id] = relation
+        _intern_relation_keys(relation)
+        relation_id = relation.id
+        head_entity_id = relation.head_entity_id
+        tail_entity_id = relation.tail_entity_id
+        
+        self.relations[relation_id] = relation
+        self._csr = None
         
         # 更新类型索引
-        if relation.type not in self.type_index:
-            self.type_index[relation.type] = []
-        self.type_index[relation.type].append(relation.id)
+        self.type_index.setdefault(relation.type, {})[relation_id] = None
         
         # 更新实体索引
-        for entity_id in [relation.head_entity_id, relation.tail_entity_id]:
-            if entity_id not in self.entity_index:
-                self.entity_index[entity_id] = []
-            self.entity_index[entity_id].append(relation.id)
+        entity_index = self.entity_index
+        entity_index.setdefault(head_entity_id, {})[relation_id] = None
+        entity_index.setdefault(tail_entity_id, {})[relation_id] = None
         
         # 更新头尾实体索引
-        head_tail_key = (relation.head_entity_id, relation.tail_entity_id)
-        if head_tail_key not in self.head_tail_index:
-            self.head_tail_index[head_tail_key] = []
-        self.head_tail_index[head_tail_key].append(relation.id)
+        head_tail_key = (head_entity_id, tail_entity_id)
+        self.head_tail_index.setdefault(head_tail_key, {})[relation_id] = None
+        
+        # 更新出边/入边索引
+        self.out_adj.setdefault(head_entity_id, {})[relation_id] = None
+        self.in_adj.setdefault(tail_entity_id, {})[relation_id] = None
+    
+    def add_relations(self, relations: Iterable[Relation]):
+        """批量添加关系（先在局部缓冲区构建索引，再一次性合并）"""
+        type_index = defaultdict(dict)
+        entity_index = defaultdict(dict)
+        head_tail_index = defaultdict(dict)
+        out_adj = defaultdict(dict)
+        in_adj = defaultdict(dict)
+        self._csr = None
+        
+        for relation in relations:
+            _intern_relation_keys(relation)
+            relation_id = relation.id
+            head_id, tail_id = relation.head_entity_id, relation.tail_entity_id
+            self.relations[relation_id] = relation
+            type_index[relation.type][relation_id] = None
+            entity_index[head_id][relation_id] = None
+            entity_index[tail_id][relation_id] = None
+            head_tail_index[(head_id, tail_id)][relation_id] = None
+            out_adj[head_id][relation_id] = None
+            in_adj[tail_id][relation_id] = None
+        
+        for target, buffer in ((self.type_index, type_index),
+                               (self.entity_index, entity_index),
+                               (self.head_tail_index, head_tail_index),
+                               (self.out_adj, out_adj),
+                               (self.in_adj, in_adj)):
+            for key, relation_ids in buffer.items():
+                existing = target.get(key)
+                if existing is None:
+                    target[key] = relation_ids
+                else:
+                    existing.update(relation_ids)
     
     def get_relation(self, relation_id: str) -> Relation:
         """根据ID获取关系"""
@@ -52,92 +174,130 @@ class RelationTypes:
     
     def get_relations_by_type(self, relation_type: str) -> List[Relation]:
         """获取指定类型的所有关系"""
-        relation_ids = self.type_index.get(relation_type, [])
+        relation_ids = self.type_index.get(relation_type, {})
         return [self.relations[rid] for rid in relation_ids]
     
     def get_relations_by_entity(self, entity_id: str) -> List[Relation]:
         """获取与指定实体相关的所有关系"""
-        relation_ids = self.entity_index.get(entity_id, [])
+        relation_ids = self.entity_index.get(entity_id, {})
         return [self.relations[rid] for rid in relation_ids]
     
     def get_relations_between_entities(self, head_entity_id: str, tail_entity_id: str) -> List[Relation]:
         """获取两个实体之间的所有关系"""
-        relation_ids = self.head_tail_index.get((head_entity_id, tail_entity_id), [])
+        relation_ids = self.head_tail_index.get((head_entity_id, tail_entity_id), {})
         return [self.relations[rid] for rid in relation_ids]
     
     def get_outgoing_relations(self, entity_id: str) -> List[Relation]:
         """获取实体的出边关系"""
-        return [rel for rel in self.get_relations_by_entity(entity_id) 
-                if rel.head_entity_id == entity_id]
+        return [self.relations[rid] for rid in self.out_adj.get(entity_id, {})]
     
     def get_incoming_relations(self, entity_id: str) -> List[Relation]:
         """获取实体的入边关系"""
-        return [rel for rel in self.get_relations_by_entity(entity_id) 
-                if rel.tail_entity_id == entity_id]
+        return [self.relations[rid] for rid in self.in_adj.get(entity_id, {})]
     
     def find_path(self, start_entity_id: str, end_entity_id: str, max_depth: int = 3) -> List[List[Relation]]:
         """找到两个实体之间的路径"""
+        if _find_paths_csr is not None:
+            return self._find_path_csr(start_entity_id, end_entity_id, max_depth)
+        
         paths = []
-        visited = set()
-        current_path = []
+        # 显式栈：(当前实体, 已走过的关系, 路径上已访问的实体)
+        stack = [(start_entity_id, (), frozenset())]
         
-        def dfs(current_entity_id: str, target_entity_id: str, depth: int):
-            if depth > max_depth:
-                return
-            
-            if current_entity_id == target_entity_id and len(current_path) > 0:
-                paths.append(current_path.copy())
-                return
+        while stack:
+            current_entity_id, path, on_path = stack.pop()
             
-            if current_entity_id in visited:
-                return
+            if current_entity_id == end_entity_id and path:
+                paths.append(list(path))
+                continue
             
-            visited.add(current_entity_id)
+            if len(path) >= max_depth or current_entity_id in on_path:
+                continue
             
-            # 探索出边关系
-            for relation in self.get_outgoing_relations(current_entity_id):
-                current_path.append(relation)
-                dfs(relation.tail_entity_id, target_entity_id, depth + 1)
-                current_path.pop()
+            next_on_path = on_path | {current_entity_id}
             
-            visited.remove(current_entity_id)
+            # 逆序入栈，保持与递归DFS相同的路径顺序
+            for relation_id in reversed(list(self.out_adj.get(current_entity_id, {}))):
+                relation = self.relations[relation_id]
+                stack.append((relation.tail_entity_id, path + (relation,), next_on_path))
         
-        dfs(start_entity_id, end_entity_id, 0)
         return paths
     
+    def _find_path_csr(self, start_entity_id: str, end_entity_id: str,
+                       max_depth: int) -> List[List[Relation]]:
+        """在CSR出边数组上用JIT编译的DFS查找路径"""
+        if self._csr is None:
+            self._csr = self._build_csr()
+        node_ids, indptr, tails, edge_relation_ids = self._csr
+        
+        start = node_ids.get(start_entity_id)
+        end = node_ids.get(end_entity_id)
+        if start is None or end is None or max_depth <= 0:
+            return []
+        
+        path_edges, path_offsets = _find_paths_csr(indptr, tails, start, end, max_depth)
+        
+        # 仅在边界处将边序号还原为关系对象
+        relations = [self.relations[edge_relation_ids[edge]] for edge in path_edges.tolist()]
+        offsets = path_offsets.tolist()
+        return [relations[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+    
+    def _build_csr(self) -> Tuple[Dict[str, int], np.ndarray, np.ndarray, List[str]]:
+        """按出边索引构建CSR数组（保持每个实体出边的插入顺序）"""
+        node_ids: Dict[str, int] = {}
+        for entity_id in self.entity_index:
+            node_ids.setdefault(entity_id, len(node_ids))
+        
+        counts = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        for head_entity_id, relation_ids in self.out_adj.items():
+            counts[node_ids[head_entity_id] + 1] = len(relation_ids)
+        indptr = np.cumsum(counts)
+        
+        tails = np.empty(int(indptr[-1]), dtype=np.int64)
+        edge_relation_ids: List[str] = [None] * len(tails)
+        for head_entity_id, relation_ids in self.out_adj.items():
+            edge = int(indptr[node_ids[head_entity_id]])
+            for relation_id in relation_ids:
+                tails[edge] = node_ids[self.relations[relation_id].tail_entity_id]
+                edge_relation_ids[edge] = relation_id
+                edge += 1
+        
+        return node_ids, indptr, tails, edge_relation_ids
+    
     def update_relation_property(self, relation_id: str, property_name: str, value: Any):
         """更新关系属性"""
-        if relation_id in self.relations:
-            self.relations[relation_id].properties[property_name] = value
+        relation = self.relations.get(relation_id)
+        if relation is not None:
+            relation.properties[property_name] = value
     
     def update_relation_confidence(self, relation_id: str, confidence: float):
         """更新关系置信度"""
-        if relation_id in self.relations:
-            self.relations[relation_id].confidence = confidence
+        relation = self.relations.get(relation_id)
+        if relation is not None:
+            relation.confidence = confidence
     
     def delete_relation(self, relation_id: str):
         """删除关系"""
-        if relation_id not in self.relations:
+        # 删除关系
+        relation = self.relations.pop(relation_id, None)
+        if relation is None:
             return
-        
-        relation = self.relations[relation_id]
+        self._csr = None
         
         # 从类型索引中移除
-        if relation.type in self.type_index:
-            self.type_index[relation.type].remove(relation_id)
+        self.type_index.get(relation.type, {}).pop(relation_id, None)
         
         # 从实体索引中移除
         for entity_id in [relation.head_entity_id, relation.tail_entity_id]:
-            if entity_id in self.entity_index:
-                self.entity_index[entity_id].remove(relation_id)
+            self.entity_index.get(entity_id, {}).pop(relation_id, None)
         
         # 从头尾实体索引中移除
         head_tail_key = (relation.head_entity_id, relation.tail_entity_id)
-        if head_tail_key in self.head_tail_index:
-            self.head_tail_index[head_tail_key].remove(relation_id)
+        self.head_tail_index.get(head_tail_key, {}).pop(relation_id, None)
         
-        # 删除关系
-        del self.relations[relation_id]
+        # 从出边/入边索引中移除
+        self.out_adj.get(relation.head_entity_id, {}).pop(relation_id, None)
+        self.in_adj.get(relation.tail_entity_id, {}).pop(relation_id, None)
     
     def get_statistics(self) -> Dict[str, Any]:
         """获取统计信息"""
@@ -151,7 +311,7 @@ class RelationTypes:
         for relation_type, relation_ids in self.type_index.items():
             stats["by_type"][relation_type] = len(relation_ids)
         
-        # 平均置信度
+        # 平均置信度（直接读取关系对象，外部修改confidence后仍然准确）
         if self.relations:
             total_confidence = sum(rel.confidence for rel in self.relations.values())
             stats["avg_confidence"] = total_confidence / len(self.relations)
@@ -161,8 +321,11 @@ class RelationTypes:
     def print_statistics(self):
         """打印统计信息"""
         stats = self.get_statistics()
-        print(f"总关系数: {stats['total_relations']}")
-        print(f"平均置信度: {stats['avg_confidence']:.2f}")
-        print("按类型分布:")
-        for relation_type, count in stats["by_type"].items():
-            print(f"  {relation_type}: {count}")
\ No newline at end of file
+        lines = [f"总关系数: {stats['total_relations']}",
+                 f"平均置信度: {stats['avg_confidence']:.2f}",
+                 "按类型分布:"]
+        lines.extend(f"  {relation_type}: {count}"
+                     for relation_type, count in stats["by_type"].items())
+        
+        # 一次性写出，避免逐行print
+        sys.stdout.write("\n".join(lines) + "\n")
\ No newline at end of file
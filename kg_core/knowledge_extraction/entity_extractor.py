@@ -2,13 +2,128 @@
 实体抽取模块
 """
 import re
+import numpy as np
+import jieba
+import jieba.finalseg
 import jieba.posseg as pseg
-from typing import List, Dict, Tuple, Set
+from typing import List, Dict, Tuple, Set, Pattern, Optional
 from dataclasses import dataclass
+from functools import lru_cache, partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from ..entity_definition.entity_types import Entity
+from ..utils.performance import DATACLASS_SLOTS, resolve_n_jobs
 
+try:
+    # 可选依赖：RE2基于自动机匹配，无回溯，长文本扫描更快
+    import re2
+except ImportError:
+    re2 = None
 
-@dataclass
+try:
+    # 可选依赖：用于JIT编译实体合并内核
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    # 可选依赖：Aho-Corasick自动机，一次扫描匹配全部字典词条
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+# RE2不支持的环视语法
+_LOOKAROUND_MARKERS = ('(?=', '(?!', '(?<=', '(?<!')
+# RE2中\d、\s、\w、\b只匹配ASCII，而re按Unicode匹配（如全角数字、全角空格），含这些简写的模式不交给RE2
+_ASCII_SHORTHAND = re.compile(r'(?<!\\)(?:\\\\)*\\[dDsSwWbB]')
+# RE2不识别\uXXXX转义，编译前需展开为字面字符
+_UNICODE_ESCAPE = re.compile(r'\\u([0-9a-fA-F]{4})')
+
+# 任意字母或数字字符（等价于逐字符str.isalnum()，但在C层完成扫描）
+_ALNUM_CHAR = re.compile(r'[^\W_]')
+
+# 合并时排除包含这些词的实体（避免将句子片段识别为实体）
+_MERGE_EXCLUDED_WORDS = ['是', '在', '的', '了', '毕业于', '工作于', '创立', '开发', '年', '他', '她', '专门', '研究', '领域']
+_MERGE_EXCLUDED_PATTERN = re.compile('|'.join(map(re.escape, _MERGE_EXCLUDED_WORDS)))
+
+# 已编译的正则模式缓存，供所有抽取器实例共享
+_PATTERN_CACHE: Dict[str, Pattern] = {}
+
+
+def _compile_pattern(pattern: str) -> Pattern:
+    """编译正则模式（带缓存）"""
+    compiled = _PATTERN_CACHE.get(pattern)
+    if compiled is None:
+        compiled = _compile_with_re2(pattern) or re.compile(pattern)
+        _PATTERN_CACHE[pattern] = compiled
+    return compiled
+
+
+def _compile_with_re2(pattern: str) -> Optional[Pattern]:
+    """尝试用RE2编译模式，不可用或不支持时返回None"""
+    if re2 is None or any(marker in pattern for marker in _LOOKAROUND_MARKERS):
+        return None
+    if _ASCII_SHORTHAND.search(pattern):
+        return None
+    try:
+        return re2.compile(_UNICODE_ESCAPE.sub(lambda m: chr(int(m.group(1), 16)), pattern))
+    except re2.error:
+        return None
+
+
+def _jieba_dictionary_state() -> Tuple:
+    """jieba词典的状态标识：load_userdict、add_word、del_word、set_dictionary都会改变其中至少一项"""
+    tokenizer = jieba.dt
+    return (tokenizer.dictionary, tokenizer.initialized, id(tokenizer.FREQ), len(tokenizer.FREQ),
+            tokenizer.total, len(tokenizer.user_word_tag_tab), len(pseg.dt.word_tag_tab),
+            len(jieba.finalseg.Force_Split_Words))
+
+
+def _pos_segment(text: str) -> Tuple[Tuple[str, str], ...]:
+    """词性标注分词（带缓存，批量处理时重复句子无需重新分词；词典变化后缓存自动失效）"""
+    return _pos_segment_cached(text, _jieba_dictionary_state())
+
+
+@lru_cache(maxsize=1024)
+def _pos_segment_cached(text: str, dictionary_state: Tuple) -> Tuple[Tuple[str, str], ...]:
+    """按 文本 + 词典状态 缓存的词性标注分词"""
+    return tuple((pair.word, pair.flag) for pair in pseg.lcut(text))
+
+
+def _empty_context(text: str, start_pos: int, end_pos: int) -> str:
+    """不截取上下文（候选实体延迟到过滤之后再截取）"""
+    return ""
+
+
+def _merge_overlapping_kernel(starts, ends, lengths, confidences, eligible):
+    """按排序后的顺序合并重叠实体，返回保留实体的下标"""
+    merged = np.empty(starts.shape[0], dtype=np.int64)
+    count = 0
+    for i in range(starts.shape[0]):
+        if not eligible[i]:
+            continue
+        
+        # 查找第一个与当前实体重叠的已合并实体
+        found = -1
+        for j in range(count):
+            m = merged[j]
+            if starts[i] <= ends[m] and ends[i] >= starts[m]:
+                found = j
+                break
+        
+        if found < 0:
+            merged[count] = i
+            count += 1
+        elif lengths[i] < lengths[merged[found]] and confidences[i] >= confidences[merged[found]]:
+            merged[found] = i
+    
+    return merged[:count]
+
+
+_merge_overlapping = njit(cache=True)(_merge_overlapping_kernel) if njit is not None else None
+
+
+@dataclass(**DATACLASS_SLOTS)
 class ExtractedEntity:
     """抽取的实体"""
     text: str
@@ -27,8 +142,30 @@ class EntityExtractor:
         self.person_indicators = {'先生', '女士', '教授', '博士', '院士', '总裁', '董事长', '经理'}
         self.org_indicators = {'公司', '企业', '集团', '组织', '机构', '学院', '大学', '医院'}
         self.location_indicators = {'市', '县', '区', '省', '国', '州', '路', '街', '镇', '村'}
+        self._dict_automaton = None  # (字典快照, 自动机)
+        self._indicator_patterns = None  # (指示词快照, 编译后的模式列表)
     
-    def _build_entity_patterns(self) -> Dict[str, List[str]]:
+    def __getstate__(self) -> Dict:
+        """序列化（如发送到批量抽取的工作进程）时RE2模式只携带源码，字典自动机在使用时重建"""
+        state = self.__dict__.copy()
+        state['entity_patterns'] = {
+            entity_type: [pattern if isinstance(pattern, re.Pattern) else pattern.pattern
+                          for pattern in patterns]
+            for entity_type, patterns in self.entity_patterns.items()
+        }
+        state['_dict_automaton'] = None
+        return state
+    
+    def __setstate__(self, state: Dict):
+        """反序列化时重新编译以源码形式携带的模式"""
+        state['entity_patterns'] = {
+            entity_type: [_compile_pattern(pattern) if isinstance(pattern, str) else pattern
+                          for pattern in patterns]
+            for entity_type, patterns in state['entity_patterns'].items()
+        }
+        self.__dict__.update(state)
+    
+    def _build_entity_patterns(self) -> Dict[str, List[Pattern]]:
         """构建实体识别模式"""
         patterns = {
             'Person': [
@@ -59,64 +196,76 @@ class EntityExtractor:
                 r'[\u4e00-\u9fa5]+(?:节|庆典|仪式)'
             ]
         }
-        return patterns
+        # 预编译所有模式；各模式单独扫描，以保留不同模式间重叠的匹配结果
+        return {entity_type: [_compile_pattern(pattern) for pattern in type_patterns]
+                for entity_type, type_patterns in patterns.items()}
     
-    def extract_by_patterns(self, text: str) -> List[ExtractedEntity]:
+    def extract_by_patterns(self, text: str, with_context: bool = True) -> List[ExtractedEntity]:
         """基于模式的实体抽取"""
         entities = []
+        # 循环内频繁使用的方法绑定为局部变量
+        append = entities.append
+        get_context = self._get_context if with_context else _empty_context
         
         for entity_type, patterns in self.entity_patterns.items():
             for pattern in patterns:
-                matches = re.finditer(pattern, text)
-                for match in matches:
-                    entity = ExtractedEntity(
+                for match in pattern.finditer(text):
+                    start_pos, end_pos = match.span()
+                    append(ExtractedEntity(
                         text=match.group(),
                         type=entity_type,
-                        start_pos=match.start(),
-                        end_pos=match.end(),
+                        start_pos=start_pos,
+                        end_pos=end_pos,
                         confidence=0.8,
-                        context=self._get_context(text, match.start(), match.end())
-                    )
-                    entities.append(entity)
+                        context=get_context(text, start_pos, end_pos)
+                    ))
         
         return entities
     
-    def extract_by_pos_tagging(self, text: str) -> List[ExtractedEntity]:
+    def extract_by_pos_tagging(self, text: str, with_context: bool = True) -> List[ExtractedEntity]:
         """基于词性标注的实体抽取"""
         entities = []
-        words_with_pos = pseg.lcut(text)
+        words_with_pos = _pos_segment(text)
+        word_count = len(words_with_pos)
+        # 循环内频繁使用的方法绑定为局部变量
+        append = entities.append
+        get_context = self._get_context if with_context else _empty_context
+        pos_to_entity_type = self._pos_to_entity_type
         
         # 改进的实体识别逻辑
         current_pos = 0
         i = 0
-        while i < len(words_with_pos):
+        while i < word_count:
             word, pos = words_with_pos[i]
-            entity_type = self._pos_to_entity_type(word, pos)
+            entity_type = pos_to_entity_type(word, pos)
             
             if entity_type:
                 # 检查是否是人名，可能需要合并相邻的人名词
-                if pos == 'nr' and i + 1 < len(words_with_pos):
+                if pos == 'nr' and i + 1 < word_count:
                     next_word, next_pos = words_with_pos[i + 1]
                     # 如果下一个词也是人名相关，合并
                     if next_pos == 'nr' and len(word) <= 2 and len(next_word) <= 2:
                         word = word + next_word
                         i += 1  # 跳过下一个词
                 
-                start_pos = text.find(word, current_pos)
+                # 分词结果按顺序覆盖原文，词语通常恰好从当前偏移开始
+                if text.startswith(word, current_pos):
+                    start_pos = current_pos
+                else:
+                    start_pos = text.find(word, current_pos)
                 if start_pos != -1:
                     end_pos = start_pos + len(word)
                     
                     # 确保实体长度合理
                     if 1 <= len(word) <= 20 and not word.isdigit():
-                        entity = ExtractedEntity(
+                        append(ExtractedEntity(
                             text=word,
                             type=entity_type,
                             start_pos=start_pos,
                             end_pos=end_pos,
-                            confidence=0.8 if pos in ['nr', 'ns', 'nt'] else 0.6,
-                            context=self._get_context(text, start_pos, end_pos)
-                        )
-                        entities.append(entity)
+                            confidence=0.8 if pos in ('nr', 'ns', 'nt') else 0.6,
+                            context=get_context(text, start_pos, end_pos)
+                        ))
             
             current_pos += len(word)
             i += 1
@@ -132,39 +281,96 @@ class EntityExtractor:
         elif pos == 'nt':  # 机构名
             return 'Organization'
         elif pos == 'n':  # 普通名词，需要进一步判断
-            if any(indicator in word for indicator in self.person_indicators):
-                return 'Person'
-            elif any(indicator in word for indicator in self.org_indicators):
-                return 'Organization'
-            elif any(indicator in word for indicator in self.location_indicators):
-                return 'Location'
+            for indicator_pattern, entity_type in self._get_indicator_patterns():
+                if indicator_pattern.search(word):
+                    return entity_type
         
         return None
     
-    def extract_by_dictionary(self, text: str, entity_dict: Dict[str, str]) -> List[ExtractedEntity]:
+    def _get_indicator_patterns(self) -> List[Tuple[Pattern, str]]:
+        """每类指示词合并为一个正则，按优先级排列；指示词集合内容变化后重新编译"""
+        snapshot = (frozenset(self.person_indicators), frozenset(self.org_indicators),
+                    frozenset(self.location_indicators))
+        cached = self._indicator_patterns
+        if cached is None or cached[0] != snapshot:
+            patterns = [(re.compile('|'.join(map(re.escape, indicators))), entity_type)
+                        for indicators, entity_type in zip(snapshot, ('Person', 'Organization', 'Location'))
+                        if indicators]
+            cached = self._indicator_patterns = (snapshot, patterns)
+        return cached[1]
+    
+    def extract_by_dictionary(self, text: str, entity_dict: Dict[str, str],
+                              with_context: bool = True) -> List[ExtractedEntity]:
         """基于字典的实体抽取"""
+        if ahocorasick is not None:
+            return self._extract_by_automaton(text, entity_dict, with_context)
+        
         entities = []
+        # 循环内频繁使用的方法绑定为局部变量
+        append = entities.append
+        get_context = self._get_context if with_context else _empty_context
+        find = text.find
         
         for entity_name, entity_type in entity_dict.items():
+            name_length = len(entity_name)
             start = 0
             while True:
-                pos = text.find(entity_name, start)
+                pos = find(entity_name, start)
                 if pos == -1:
                     break
                 
-                entity = ExtractedEntity(
+                append(ExtractedEntity(
                     text=entity_name,
                     type=entity_type,
                     start_pos=pos,
-                    end_pos=pos + len(entity_name),
+                    end_pos=pos + name_length,
                     confidence=1.0,
-                    context=self._get_context(text, pos, pos + len(entity_name))
-                )
-                entities.append(entity)
+                    context=get_context(text, pos, pos + name_length)
+                ))
                 start = pos + 1
         
         return entities
     
+    def _extract_by_automaton(self, text: str, entity_dict: Dict[str, str],
+                              with_context: bool = True) -> List[ExtractedEntity]:
+        """基于Aho-Corasick自动机的字典抽取（包含重叠匹配）"""
+        automaton = self._get_dict_automaton(entity_dict)
+        entities = []
+        
+        # 没有任何词条时自动机未构建，直接返回
+        if automaton.kind == ahocorasick.EMPTY:
+            return entities
+        
+        # 循环内频繁使用的方法绑定为局部变量
+        append = entities.append
+        get_context = self._get_context if with_context else _empty_context
+        
+        for end_index, (entity_name, entity_type) in automaton.iter(text):
+            end_pos = end_index + 1
+            start_pos = end_pos - len(entity_name)
+            append(ExtractedEntity(
+                text=entity_name,
+                type=entity_type,
+                start_pos=start_pos,
+                end_pos=end_pos,
+                confidence=1.0,
+                context=get_context(text, start_pos, end_pos)
+            ))
+        
+        return entities
+    
+    def _get_dict_automaton(self, entity_dict: Dict[str, str]):
+        """获取字典对应的自动机，字典内容不变时复用"""
+        snapshot = frozenset(entity_dict.items())
+        if self._dict_automaton is None or self._dict_automaton[0] != snapshot:
+            automaton = ahocorasick.Automaton()
+            for entity_name, entity_type in entity_dict.items():
+                if entity_name:
+                    automaton.add_word(entity_name, (entity_name, entity_type))
+            automaton.make_automaton()
+            self._dict_automaton = (snapshot, automaton)
+        return self._dict_automaton[1]
+    
     def _get_context(self, text: str, start_pos: int, end_pos: int, window_size: int = 20) -> str:
         """获取实体的上下文"""
         context_start = max(0, start_pos - window_size)
@@ -179,7 +385,13 @@ class EntityExtractor:
         # 按位置排序
         entities.sort(key=lambda x: (x.start_pos, x.end_pos))
         
+        if _merge_overlapping is not None:
+            return self._merge_entities_jit(entities)
+        
+        # 已合并实体的起止位置（预分配数组，重叠检测向量化）
         merged = []
+        merged_starts = np.empty(len(entities), dtype=np.int64)
+        merged_ends = np.empty(len(entities), dtype=np.int64)
         
         for current in entities:
             # 过滤过长的实体（可能是错误识别的句子片段）
@@ -187,48 +399,68 @@ class EntityExtractor:
                 continue
             
             # 过滤包含动词的实体（避免将句子识别为实体）
-            if any(verb in current.text for verb in ['是', '在', '的', '了', '毕业于', '工作于', '创立', '开发', '年', '他', '她', '专门', '研究', '领域']):
+            if _MERGE_EXCLUDED_PATTERN.search(current.text):
                 continue
-                
-            should_add = True
-            for i, existing in enumerate(merged):
-                # 检查是否重叠
-                if (current.start_pos <= existing.end_pos and 
-                    current.end_pos >= existing.start_pos):
-                    
-                    # 如果当前实体更短且置信度更高，替换
-                    if (len(current.text) < len(existing.text) and 
-                        current.confidence >= existing.confidence):
-                        merged[i] = current
-                        should_add = False
-                        break
-                    # 如果现有实体更好，跳过当前实体
-                    else:
-                        should_add = False
-                        break
             
-            if should_add:
+            # 查找第一个与当前实体重叠的已合并实体
+            count = len(merged)
+            overlaps = np.flatnonzero((current.start_pos <= merged_ends[:count]) &
+                                      (current.end_pos >= merged_starts[:count]))
+            
+            if overlaps.size:
+                i = overlaps[0]
+                existing = merged[i]
+                # 如果当前实体更短且置信度更高，替换；否则保留现有实体
+                if (len(current.text) < len(existing.text) and 
+                    current.confidence >= existing.confidence):
+                    merged[i] = current
+                    merged_starts[i] = current.start_pos
+                    merged_ends[i] = current.end_pos
+            else:
+                merged_starts[count] = current.start_pos
+                merged_ends[count] = current.end_pos
                 merged.append(current)
         
         return merged
     
+    def _merge_entities_jit(self, entities: List[ExtractedEntity]) -> List[ExtractedEntity]:
+        """将已排序的实体转为列式数组，交给JIT编译的内核合并"""
+        count = len(entities)
+        starts = np.fromiter((entity.start_pos for entity in entities), dtype=np.int64, count=count)
+        ends = np.fromiter((entity.end_pos for entity in entities), dtype=np.int64, count=count)
+        lengths = np.fromiter((len(entity.text) for entity in entities), dtype=np.int64, count=count)
+        confidences = np.fromiter((entity.confidence for entity in entities),
+                                  dtype=np.float64, count=count)
+        # 过长或包含排除词的实体不参与合并
+        eligible = np.fromiter((len(entity.text) <= 15 and
+                                not _MERGE_EXCLUDED_PATTERN.search(entity.text)
+                                for entity in entities), dtype=np.bool_, count=count)
+        
+        indices = _merge_overlapping(starts, ends, lengths, confidences, eligible)
+        return [entities[i] for i in indices.tolist()]
+    
     def filter_entities(self, entities: List[ExtractedEntity], 
                        min_confidence: float = 0.5,
                        min_length: int = 2) -> List[ExtractedEntity]:
         """过滤实体"""
+        if not entities:
+            return []
+        
+        # 置信度和长度过滤一次性向量化完成
+        count = len(entities)
+        confidences = np.fromiter((entity.confidence for entity in entities),
+                                  dtype=np.float64, count=count)
+        lengths = np.fromiter((len(entity.text) for entity in entities),
+                              dtype=np.int64, count=count)
+        candidates = np.flatnonzero((confidences >= min_confidence) & (lengths >= min_length))
+        
         filtered = []
         
-        for entity in entities:
-            # 过滤低置信度实体
-            if entity.confidence < min_confidence:
-                continue
-            
-            # 过滤过短的实体
-            if len(entity.text) < min_length:
-                continue
+        for index in candidates:
+            entity = entities[index]
             
             # 过滤纯数字或纯符号
-            if entity.text.isdigit() or not any(c.isalnum() for c in entity.text):
+            if entity.text.isdigit() or not _ALNUM_CHAR.search(entity.text):
                 continue
             
             filtered.append(entity)
@@ -243,19 +475,20 @@ class EntityExtractor:
         """综合实体抽取"""
         all_entities = []
         
+        # 候选实体先不截取上下文，过滤后只为保留的实体截取
         # 基于模式的抽取
         if use_patterns:
-            pattern_entities = self.extract_by_patterns(text)
+            pattern_entities = self.extract_by_patterns(text, with_context=False)
             all_entities.extend(pattern_entities)
         
         # 基于词性的抽取
         if use_pos:
-            pos_entities = self.extract_by_pos_tagging(text)
+            pos_entities = self.extract_by_pos_tagging(text, with_context=False)
             all_entities.extend(pos_entities)
         
         # 基于字典的抽取
         if use_dict and entity_dict:
-            dict_entities = self.extract_by_dictionary(text, entity_dict)
+            dict_entities = self.extract_by_dictionary(text, entity_dict, with_context=False)
             all_entities.extend(dict_entities)
         
         # 暂时禁用上下文抽取，避免错误匹配
@@ -266,8 +499,43 @@ class EntityExtractor:
         merged_entities = self.merge_entities(all_entities)
         filtered_entities = self.filter_entities(merged_entities)
         
+        for entity in filtered_entities:
+            entity.context = self._get_context(text, entity.start_pos, entity.end_pos)
+        
         return filtered_entities
     
+    def extract_entities_batch(self, texts: List[str],
+                               entity_dict: Dict[str, str] = None,
+                               use_patterns: bool = True,
+                               use_pos: bool = True,
+                               use_dict: bool = True,
+                               n_jobs: int = None,
+                               use_threads: bool = False) -> List[List[ExtractedEntity]]:
+        """批量实体抽取，各文档并行处理，结果顺序与输入一致
+        
+        n_jobs沿用joblib约定：None为全部CPU，n_jobs <= 0表示 CPU数 + 1 + n_jobs
+        （-1即全部CPU）。默认使用进程池（词性标注持有GIL），每个工作进程
+        收到当前抽取器的副本，自定义的模式和指示词同样生效；仅使用正则模式时
+        可设置use_threads=True改用线程池，避免进程启动和序列化开销。
+        """
+        workers = min(resolve_n_jobs(n_jobs), len(texts))
+        extract = partial(_extract_document, entity_dict=entity_dict,
+                          use_patterns=use_patterns, use_pos=use_pos, use_dict=use_dict)
+        
+        if workers <= 1:
+            return [extract(text, extractor=self) for text in texts]
+        
+        if use_threads:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(partial(extract, extractor=self), texts))
+        
+        # 抽取器在每个工作进程初始化时传入一次，而不是随每个文档序列化
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_batch_worker,
+                                 initargs=(self,)) as executor:
+            chunksize = max(1, len(texts) // (workers * 4))
+            return list(executor.map(extract, texts, chunksize=chunksize))
+    
     def extract_by_context(self, text: str) -> List[ExtractedEntity]:
         """基于上下文的实体抽取，处理复合词"""
         entities = []
@@ -342,4 +610,23 @@ class EntityExtractor:
         for entity_type, type_entities in by_type.items():
             print(f"\n{entity_type} ({len(type_entities)}):")
             for entity in type_entities:
-                print(f"  - {entity.text} (置信度: {entity.confidence:.2f})")
\ No newline at end of file
+                print(f"  - {entity.text} (置信度: {entity.confidence:.2f})")
+
+
+# 批量抽取工作进程中的抽取器实例
+_worker_extractor: Optional[EntityExtractor] = None
+
+
+def _init_batch_worker(extractor: EntityExtractor):
+    """初始化批量抽取工作进程"""
+    global _worker_extractor
+    _worker_extractor = extractor
+
+
+def _extract_document(text: str, entity_dict: Dict[str, str] = None,
+                      use_patterns: bool = True, use_pos: bool = True,
+                      use_dict: bool = True,
+                      extractor: EntityExtractor = None) -> List[ExtractedEntity]:
+    """抽取单个文档的实体（进程池中使用工作进程的抽取器）"""
+    extractor = extractor or _worker_extractor
+    return extractor.extract_entities(text, entity_dict, use_patterns, use_pos, use_dict)
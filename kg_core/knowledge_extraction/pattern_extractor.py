@@ -1,15 +1,89 @@
 """
 模式抽取模块 - 发现和学习新的抽取模式
 """
-import re
-from typing import List, Dict, Tuple, Set
+import sys
+import numpy as np
+from typing import List, Dict, Tuple, Set, Iterator
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain, islice
 from dataclasses import dataclass
 from .entity_extractor import ExtractedEntity
 from .relation_extractor import ExtractedRelation
+from ..utils.serialization import dumps_json, loads_json
+from ..utils.performance import DATACLASS_SLOTS, resolve_n_jobs
 
+try:
+    # 可选依赖：Aho-Corasick自动机，一次扫描定位全部种子实体
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
-@dataclass
+
+# 验证模式时预过滤使用的字符n-gram长度
+_PREFILTER_GRAM = 4
+
+
+def _prefix_keys(before: str) -> List[str]:
+    """单个实体前文产生的前缀模式键"""
+    before_text = before.strip()
+    if not before_text:
+        return []
+    
+    # 词汇模式：最后一个词、最后两个词（只从右侧切出需要的两个词）
+    words = before_text.rsplit(None, 2)
+    keys = [words[-1]]
+    if len(words) >= 2:
+        keys.append(' '.join(words[-2:]))
+    
+    # 字符模式
+    keys.append(before_text[-1:])
+    if len(before_text) >= 2:
+        keys.append(before_text[-2:])
+    return keys
+
+
+def _suffix_keys(after: str) -> List[str]:
+    """单个实体后文产生的后缀模式键"""
+    after_text = after.strip()
+    if not after_text:
+        return []
+    
+    # 词汇模式：第一个词、前两个词（只从左侧切出需要的两个词）
+    words = after_text.split(None, 2)
+    keys = [words[0]]
+    if len(words) >= 2:
+        keys.append(' '.join(words[:2]))
+    
+    # 字符模式
+    keys.append(after_text[:1])
+    if len(after_text) >= 2:
+        keys.append(after_text[:2])
+    return keys
+
+
+def _middle_keys(middle: str) -> List[str]:
+    """单个关系中间文本产生的中间模式键"""
+    # split()按空白切分并去掉首尾空白，与strip后把连续空白压成单个空格等价
+    words = middle.split()
+    if not words:
+        return []
+    
+    # 整个中间文本（空白已规整）及关键词
+    keys = [' '.join(words)]
+    keys.extend(word for word in words
+                if len(word) > 1 and not word.isdigit())
+    return keys
+
+
+def _frequent_patterns(patterns: Counter, min_frequency: int = 2) -> List[Tuple[str, int]]:
+    """按首次出现顺序筛选出至少出现min_frequency次的模式"""
+    return [(pattern_text, freq) for pattern_text, freq in patterns.items()
+            if freq >= min_frequency]
+
+
+@dataclass(**DATACLASS_SLOTS)
 class Pattern:
     """抽取模式"""
     pattern_text: str
@@ -29,216 +103,213 @@ class PatternExtractor:
         self.learned_patterns = []
     
     def discover_entity_patterns(self, texts: List[str], 
-                                entities: List[List[ExtractedEntity]]) -> List[Pattern]:
-        """发现实体抽取模式"""
+                                entities: List[List[ExtractedEntity]],
+                                n_jobs: int = 1) -> List[Pattern]:
+        """发现实体抽取模式
+        
+        n_jobs沿用joblib约定（None为全部CPU，n_jobs <= 0表示 CPU数 + 1 + n_jobs）；
+        换算后大于1时，上下文收集按文本分块在进程池中并行执行，适用于大规模语料；
+        结果与串行一致。
+        """
         patterns = []
-        entity_contexts = defaultdict(list)
         
         # 收集实体上下文
-        for text, text_entities in zip(texts, entities):
-            for entity in text_entities:
-                context = self._get_entity_context(text, entity)
-                entity_contexts[entity.type].append({
-                    'entity': entity.text,
-                    'context': context,
-                    'before': context['before'],
-                    'after': context['after']
-                })
+        workers = min(resolve_n_jobs(n_jobs), len(texts), len(entities))
+        if workers <= 1:
+            entity_contexts = _collect_entity_contexts(self, texts, entities)
+        else:
+            entity_contexts = self._collect_entity_contexts_parallel(texts, entities, workers)
         
         # 分析每种实体类型的模式
         for entity_type, contexts in entity_contexts.items():
+            entity_names = contexts['entity']
+            befores, afters = contexts['before'], contexts['after']
+            # 置信度 = 频次 / 上下文数，倒数只算一次
+            inv_n = 1.0 / len(entity_names)
+            
             # 前缀模式
-            before_patterns = self._extract_prefix_patterns(contexts)
-            for pattern_text, freq in before_patterns.items():
-                if freq >= 2:  # 至少出现2次
-                    confidence = min(1.0, freq / len(contexts))
-                    examples = [ctx['entity'] for ctx in contexts 
-                              if pattern_text in ctx['before']][:5]
-                    
-                    pattern = Pattern(
-                        pattern_text=pattern_text,
-                        pattern_type='entity',
-                        target_type=entity_type,
-                        confidence=confidence,
-                        frequency=freq,
-                        examples=examples
-                    )
-                    patterns.append(pattern)
+            before_patterns = _frequent_patterns(self._extract_prefix_patterns(befores))
+            example_index = self._build_example_index(
+                [pattern_text for pattern_text, _ in before_patterns],
+                befores, entity_names, 5)
+            for pattern_text, freq in before_patterns:
+                confidence = min(1.0, freq * inv_n)
+                
+                pattern = Pattern(
+                    pattern_text=pattern_text,
+                    pattern_type='entity',
+                    target_type=entity_type,
+                    confidence=confidence,
+                    frequency=freq,
+                    examples=example_index[pattern_text]
+                )
+                patterns.append(pattern)
             
             # 后缀模式
-            after_patterns = self._extract_suffix_patterns(contexts)
-            for pattern_text, freq in after_patterns.items():
-                if freq >= 2:
-                    confidence = min(1.0, freq / len(contexts))
-                    examples = [ctx['entity'] for ctx in contexts 
-                              if pattern_text in ctx['after']][:5]
-                    
-                    pattern = Pattern(
-                        pattern_text=pattern_text,
-                        pattern_type='entity',
-                        target_type=entity_type,
-                        confidence=confidence,
-                        frequency=freq,
-                        examples=examples
-                    )
-                    patterns.append(pattern)
+            after_patterns = _frequent_patterns(self._extract_suffix_patterns(afters))
+            example_index = self._build_example_index(
+                [pattern_text for pattern_text, _ in after_patterns],
+                afters, entity_names, 5)
+            for pattern_text, freq in after_patterns:
+                confidence = min(1.0, freq * inv_n)
+                
+                pattern = Pattern(
+                    pattern_text=pattern_text,
+                    pattern_type='entity',
+                    target_type=entity_type,
+                    confidence=confidence,
+                    frequency=freq,
+                    examples=example_index[pattern_text]
+                )
+                patterns.append(pattern)
         
         return patterns
     
+    def _collect_entity_contexts_parallel(self, texts: List[str],
+                                          entities: List[List[ExtractedEntity]],
+                                          workers: int) -> Dict[str, Dict[str, List[str]]]:
+        """按文本分块并行收集实体上下文，按块顺序合并以保持串行时的顺序"""
+        n_texts = min(len(texts), len(entities))
+        chunk_size = max(1, -(-n_texts // (workers * 4)))
+        starts = range(0, n_texts, chunk_size)
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partials = executor.map(partial(_collect_entity_contexts, self),
+                                    [texts[i:i + chunk_size] for i in starts],
+                                    [entities[i:i + chunk_size] for i in starts])
+            
+            entity_contexts = {}
+            for chunk_contexts in partials:
+                for entity_type, contexts in chunk_contexts.items():
+                    merged = entity_contexts.get(entity_type)
+                    if merged is None:
+                        entity_contexts[entity_type] = contexts
+                    else:
+                        for key, values in contexts.items():
+                            merged[key].extend(values)
+        
+        return entity_contexts
+    
     def discover_relation_patterns(self, texts: List[str], 
                                  relations: List[List[ExtractedRelation]]) -> List[Pattern]:
         """发现关系抽取模式"""
         patterns = []
-        relation_contexts = defaultdict(list)
+        # 每种关系类型存放并列的头实体、尾实体、中间文本列表
+        relation_contexts = defaultdict(lambda: {'head': [], 'tail': [], 'middle': []})
         
         # 收集关系上下文
         for text, text_relations in zip(texts, relations):
+            # 同一文本中重复出现的头实体只查找一次
+            head_positions = {}
             for relation in text_relations:
-                context = self._get_relation_context(text, relation)
-                relation_contexts[relation.relation_type].append({
-                    'head': relation.head_entity,
-                    'tail': relation.tail_entity,
-                    'context': context,
-                    'middle': context['middle']
-                })
+                middle = self._get_relation_context(text, relation,
+                                                    head_positions=head_positions)
+                contexts = relation_contexts[sys.intern(relation.relation_type)]
+                contexts['head'].append(relation.head_entity)
+                contexts['tail'].append(relation.tail_entity)
+                contexts['middle'].append(middle)
         
         # 分析每种关系类型的模式
         for relation_type, contexts in relation_contexts.items():
-            middle_patterns = self._extract_middle_patterns(contexts)
+            middles = contexts['middle']
+            inv_n = 1.0 / len(middles)
+            middle_patterns = _frequent_patterns(self._extract_middle_patterns(middles))
+            example_index = self._build_example_index(
+                [pattern_text for pattern_text, _ in middle_patterns],
+                middles,
+                [f"{head} -> {tail}" for head, tail in zip(contexts['head'], contexts['tail'])], 5)
             
-            for pattern_text, freq in middle_patterns.items():
-                if freq >= 2:
-                    confidence = min(1.0, freq / len(contexts))
-                    examples = [f"{ctx['head']} -> {ctx['tail']}" for ctx in contexts 
-                              if pattern_text in ctx['middle']][:5]
-                    
-                    pattern = Pattern(
-                        pattern_text=pattern_text,
-                        pattern_type='relation',
-                        target_type=relation_type,
-                        confidence=confidence,
-                        frequency=freq,
-                        examples=examples
-                    )
-                    patterns.append(pattern)
+            for pattern_text, freq in middle_patterns:
+                confidence = min(1.0, freq * inv_n)
+                
+                pattern = Pattern(
+                    pattern_text=pattern_text,
+                    pattern_type='relation',
+                    target_type=relation_type,
+                    confidence=confidence,
+                    frequency=freq,
+                    examples=example_index[pattern_text]
+                )
+                patterns.append(pattern)
         
         return patterns
     
     def _get_entity_context(self, text: str, entity: ExtractedEntity, 
-                           window_size: int = 10) -> Dict[str, str]:
-        """获取实体的上下文信息"""
+                           window_size: int = 10) -> Tuple[str, str]:
+        """获取实体前后窗口内的文本 (before, after)"""
         start, end = entity.start_pos, entity.end_pos
         
         before_start = max(0, start - window_size)
         after_end = min(len(text), end + window_size)
         
-        return {
-            'before': text[before_start:start],
-            'entity': text[start:end],
-            'after': text[end:after_end],
-            'full': text[before_start:after_end]
-        }
+        return text[before_start:start], text[end:after_end]
     
     def _get_relation_context(self, text: str, relation: ExtractedRelation,
-                             window_size: int = 5) -> Dict[str, str]:
-        """获取关系的上下文信息"""
-        # 简化处理：假设头尾实体在文本中的位置
-        head_pos = text.find(relation.head_entity)
-        tail_pos = text.find(relation.tail_entity, head_pos + len(relation.head_entity))
+                             head_positions: Dict[str, int] = None) -> str:
+        """获取关系头尾实体之间的文本"""
+        if relation.head_pos >= 0 and relation.tail_pos >= 0:
+            # 抽取阶段已记录头尾实体位置，直接切片
+            head_pos, tail_pos = relation.head_pos, relation.tail_pos
+        else:
+            # 简化处理：假设头尾实体在文本中的位置
+            head_pos = head_positions.get(relation.head_entity) if head_positions is not None else None
+            if head_pos is None:
+                head_pos = text.find(relation.head_entity)
+                if head_positions is not None:
+                    head_positions[relation.head_entity] = head_pos
+            tail_pos = text.find(relation.tail_entity, head_pos + len(relation.head_entity))
         
         if head_pos == -1 or tail_pos == -1:
-            return {'middle': '', 'before': '', 'after': ''}
+            return ''
         
-        head_end = head_pos + len(relation.head_entity)
+        return text[head_pos + len(relation.head_entity):tail_pos]
+    
+    def _build_example_index(self, pattern_texts: List[str], fields: List[str],
+                             labels: List[str], limit: int) -> Dict[str, List[str]]:
+        """一次遍历上下文，为每个模式收集前limit个包含该模式的上下文示例"""
+        example_index = {pattern_text: [] for pattern_text in pattern_texts}
+        if not example_index:
+            return example_index
         
-        before_start = max(0, head_pos - window_size)
-        after_end = min(len(text), tail_pos + len(relation.tail_entity) + window_size)
+        if ahocorasick is None or '' in example_index:
+            for pattern_text, examples in example_index.items():
+                examples.extend(islice((label for field, label in zip(fields, labels)
+                                        if pattern_text in field), limit))
+            return example_index
         
-        return {
-            'before': text[before_start:head_pos],
-            'head': text[head_pos:head_end],
-            'middle': text[head_end:tail_pos],
-            'tail': text[tail_pos:tail_pos + len(relation.tail_entity)],
-            'after': text[tail_pos + len(relation.tail_entity):after_end],
-            'full': text[before_start:after_end]
-        }
-    
-    def _extract_prefix_patterns(self, contexts: List[Dict]) -> Counter:
-        """提取前缀模式"""
-        patterns = Counter()
+        automaton = ahocorasick.Automaton()
+        for pattern_text in example_index:
+            automaton.add_word(pattern_text, pattern_text)
+        automaton.make_automaton()
         
-        for context in contexts:
-            before_text = context['before'].strip()
-            if not before_text:
-                continue
-            
-            # 提取词汇模式
-            words = before_text.split()
-            if words:
-                # 最后一个词
-                patterns[words[-1]] += 1
-                
-                # 最后两个词
-                if len(words) >= 2:
-                    patterns[' '.join(words[-2:])] += 1
-            
-            # 提取字符模式
-            if len(before_text) >= 1:
-                patterns[before_text[-1:]] += 1
-            if len(before_text) >= 2:
-                patterns[before_text[-2:]] += 1
+        # 所有模式都收满示例后提前结束
+        unfilled = len(example_index)
+        for field, label in zip(fields, labels):
+            # 同一上下文中多次出现的模式只记一个示例
+            hit_patterns = {pattern_text for _, pattern_text in automaton.iter(field)}
+            for pattern_text in hit_patterns:
+                examples = example_index[pattern_text]
+                if len(examples) < limit:
+                    examples.append(label)
+                    if len(examples) == limit:
+                        unfilled -= 1
+            if not unfilled:
+                break
         
-        return patterns
+        return example_index
+    
+    def _extract_prefix_patterns(self, befores: List[str]) -> Counter:
+        """提取前缀模式"""
+        # 整体交给Counter.update，计数循环在C层完成
+        return Counter(chain.from_iterable(map(_prefix_keys, befores)))
     
-    def _extract_suffix_patterns(self, contexts: List[Dict]) -> Counter:
+    def _extract_suffix_patterns(self, afters: List[str]) -> Counter:
         """提取后缀模式"""
-        patterns = Counter()
-        
-        for context in contexts:
-            after_text = context['after'].strip()
-            if not after_text:
-                continue
-            
-            # 提取词汇模式
-            words = after_text.split()
-            if words:
-                # 第一个词
-                patterns[words[0]] += 1
-                
-                # 前两个词
-                if len(words) >= 2:
-                    patterns[' '.join(words[:2])] += 1
-            
-            # 提取字符模式
-            if len(after_text) >= 1:
-                patterns[after_text[:1]] += 1
-            if len(after_text) >= 2:
-                patterns[after_text[:2]] += 1
-        
-        return patterns
+        return Counter(chain.from_iterable(map(_suffix_keys, afters)))
     
-    def _extract_middle_patterns(self, contexts: List[Dict]) -> Counter:
+    def _extract_middle_patterns(self, middles: List[str]) -> Counter:
         """提取中间模式（用于关系）"""
-        patterns = Counter()
-        
-        for context in contexts:
-            middle_text = context['middle'].strip()
-            if not middle_text:
-                continue
-            
-            # 清理文本
-            cleaned = re.sub(r'\s+', ' ', middle_text)
-            
-            # 整个中间文本
-            patterns[cleaned] += 1
-            
-            # 提取关键词
-            words = cleaned.split()
-            for word in words:
-                if len(word) > 1 and not word.isdigit():
-                    patterns[word] += 1
-        
-        return patterns
+        return Counter(chain.from_iterable(map(_middle_keys, middles)))
     
     def learn_patterns_from_seeds(self, texts: List[str], 
                                  seed_entities: Dict[str, List[str]],
@@ -246,102 +317,188 @@ class PatternExtractor:
         """从种子实体和关系学习模式"""
         learned_patterns = []
         
+        # 每个文本只扫描一次，得到全部种子实体的出现位置
+        text_positions = self._locate_seed_entities(texts, seed_entities)
+        
         # 从种子实体学习
         for entity_type, entity_list in seed_entities.items():
-            contexts = []
+            # 种子学习只产出前缀模式，只需收集实体名和前文
+            entity_names = []
+            befores = []
             
-            for text in texts:
+            for text, positions_map in zip(texts, text_positions):
                 for entity in entity_list:
-                    positions = self._find_all_positions(text, entity)
+                    positions = positions_map.get(entity, ())
                     for pos in positions:
-                        context = {
-                            'entity': entity,
-                            'before': text[max(0, pos-10):pos],
-                            'after': text[pos+len(entity):pos+len(entity)+10]
-                        }
-                        contexts.append(context)
+                        entity_names.append(entity)
+                        befores.append(text[max(0, pos-10):pos])
             
-            if contexts:
+            if befores:
+                inv_n = 1.0 / len(befores)
+                
                 # 提取模式
-                before_patterns = self._extract_prefix_patterns(contexts)
-                after_patterns = self._extract_suffix_patterns(contexts)
+                before_patterns = _frequent_patterns(self._extract_prefix_patterns(befores))
+                example_index = self._build_example_index(
+                    [pattern_text for pattern_text, _ in before_patterns],
+                    befores, entity_names, 3)
                 
                 # 转换为Pattern对象
-                for pattern_text, freq in before_patterns.items():
-                    if freq >= 2:
-                        pattern = Pattern(
-                            pattern_text=pattern_text,
-                            pattern_type='entity',
-                            target_type=entity_type,
-                            confidence=freq / len(contexts),
-                            frequency=freq,
-                            examples=[ctx['entity'] for ctx in contexts 
-                                    if pattern_text in ctx['before']][:3]
-                        )
-                        learned_patterns.append(pattern)
+                for pattern_text, freq in before_patterns:
+                    pattern = Pattern(
+                        pattern_text=pattern_text,
+                        pattern_type='entity',
+                        target_type=entity_type,
+                        confidence=freq * inv_n,
+                        frequency=freq,
+                        examples=example_index[pattern_text]
+                    )
+                    learned_patterns.append(pattern)
         
         return learned_patterns
     
+    def _locate_seed_entities(self, texts: List[str],
+                              seed_entities: Dict[str, List[str]]) -> List[Dict[str, List[int]]]:
+        """定位每个文本中所有种子实体的出现位置（含重叠出现）"""
+        all_entities = {entity for entity_list in seed_entities.values() for entity in entity_list}
+        
+        if ahocorasick is None or '' in all_entities:
+            return [{entity: self._find_all_positions(text, entity) for entity in all_entities}
+                    for text in texts]
+        
+        automaton = ahocorasick.Automaton()
+        for entity in all_entities:
+            automaton.add_word(entity, entity)
+        
+        # 没有任何种子实体时自动机未构建
+        if automaton.kind == ahocorasick.EMPTY:
+            return [{} for _ in texts]
+        automaton.make_automaton()
+        
+        text_positions = []
+        for text in texts:
+            positions_map = defaultdict(list)
+            for end_index, entity in automaton.iter(text):
+                positions_map[entity].append(end_index - len(entity) + 1)
+            text_positions.append(positions_map)
+        return text_positions
+    
     def _find_all_positions(self, text: str, substring: str) -> List[int]:
         """找到子字符串在文本中的所有位置"""
-        positions = []
-        start = 0
-        while True:
-            pos = text.find(substring, start)
-            if pos == -1:
-                break
-            positions.append(pos)
-            start = pos + 1
-        return positions
+        return list(self._iter_positions(text, substring))
+    
+    def _iter_positions(self, text: str, substring: str) -> Iterator[int]:
+        """逐个产出子字符串在文本中的位置（含重叠出现），不构建列表"""
+        find = text.find
+        pos = find(substring)
+        while pos != -1:
+            yield pos
+            pos = find(substring, pos + 1)
     
     def validate_patterns(self, patterns: List[Pattern], 
                          validation_texts: List[str]) -> List[Pattern]:
         """验证模式的有效性"""
         validated_patterns = []
         
-        for pattern in patterns:
-            # 在验证集上测试模式
-            matches = 0
-            total_attempts = 0
-            
-            for text in validation_texts:
-                if pattern.pattern_type == 'entity':
-                    # 测试实体模式
-                    pattern_matches = self._test_entity_pattern(text, pattern)
-                    matches += len(pattern_matches)
-                    total_attempts += 1
-                
-                elif pattern.pattern_type == 'relation':
-                    # 测试关系模式
-                    pattern_matches = self._test_relation_pattern(text, pattern)
-                    matches += len(pattern_matches)
-                    total_attempts += 1
-            
-            # 计算验证置信度
-            if total_attempts > 0:
+        # 没有验证文本时不产生任何尝试，所有模式都不通过
+        if not validation_texts:
+            return validated_patterns
+        
+        total_attempts = len(validation_texts)
+        # 实体模式统一用自动机扫描，每个验证文本只遍历一次，置信度整体向量化计算
+        entity_matches = self._count_entity_pattern_matches(patterns, validation_texts)
+        entity_confidences = (entity_matches / total_attempts).tolist()
+        
+        for idx, pattern in enumerate(patterns):
+            # 在验证集上测试模式，计算验证置信度
+            if pattern.pattern_type == 'entity':
+                validation_confidence = entity_confidences[idx]
+            elif pattern.pattern_type == 'relation':
+                matches = sum(len(self._test_relation_pattern(text, pattern))
+                              for text in validation_texts)
                 validation_confidence = matches / total_attempts
-                if validation_confidence > 0.1:  # 阈值
-                    pattern.confidence = (pattern.confidence + validation_confidence) / 2
-                    validated_patterns.append(pattern)
+            else:
+                continue
+            
+            if validation_confidence > 0.1:  # 阈值
+                pattern.confidence = (pattern.confidence + validation_confidence) / 2
+                validated_patterns.append(pattern)
         
         return validated_patterns
     
-    def _test_entity_pattern(self, text: str, pattern: Pattern) -> List[str]:
-        """测试实体模式"""
-        matches = []
-        # 简化的模式测试
-        if pattern.pattern_text in text:
-            # 查找模式后的潜在实体
-            positions = self._find_all_positions(text, pattern.pattern_text)
-            for pos in positions:
-                start = pos + len(pattern.pattern_text)
-                # 提取后续的词作为潜在实体
-                remaining = text[start:start+20]
-                words = remaining.split()
-                if words:
-                    matches.append(words[0])
+    def _build_pattern_automaton(self, patterns: List[Pattern]):
+        """将实体模式编译为自动机，模式文本映射到对应的模式下标"""
+        if ahocorasick is None:
+            return None
         
-        return matches
+        pattern_indices = defaultdict(list)
+        for idx, pattern in enumerate(patterns):
+            if pattern.pattern_type == 'entity':
+                pattern_indices[pattern.pattern_text].append(idx)
+        
+        # 空模式在每个位置都命中，自动机无法表示
+        if not pattern_indices or '' in pattern_indices:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for pattern_text, indices in pattern_indices.items():
+            automaton.add_word(pattern_text, indices)
+        automaton.make_automaton()
+        return automaton
+    
+    def _count_entity_pattern_matches(self, patterns: List[Pattern],
+                                      texts: List[str]) -> np.ndarray:
+        """统计每个实体模式在验证文本上的匹配数，非实体模式计为0"""
+        automaton = self._build_pattern_automaton(patterns)
+        
+        if automaton is None:
+            return self._count_entity_pattern_matches_by_scan(patterns, texts)
+        
+        # 扫描时只记录命中的模式下标，最后一次性计数
+        hit_indices = []
+        extend = hit_indices.extend
+        for text in texts:
+            for end_index, indices in automaton.iter(text):
+                # 模式之后20个字符内存在词语即视为一次匹配（与_count_entity_pattern一致）
+                start = end_index + 1
+                following = text[start:start + 20]
+                if following and not following.isspace():
+                    extend(indices)
+        
+        return np.bincount(np.asarray(hit_indices, dtype=np.int64), minlength=len(patterns))
+    
+    def _count_entity_pattern_matches_by_scan(self, patterns: List[Pattern],
+                                              texts: List[str]) -> np.ndarray:
+        """逐模式扫描统计匹配数（无自动机时使用），先用4-gram集合排除不可能命中的模式"""
+        counts = [0] * len(patterns)
+        entity_indices = [idx for idx, pattern in enumerate(patterns)
+                          if pattern.pattern_type == 'entity']
+        has_long_patterns = any(len(patterns[idx].pattern_text) >= _PREFILTER_GRAM
+                                for idx in entity_indices)
+        
+        for text in texts:
+            # 文本中出现的全部4-gram；长模式的前4个字符不在其中则必然不匹配
+            grams = ({text[i:i + _PREFILTER_GRAM] for i in range(len(text) - _PREFILTER_GRAM + 1)}
+                     if has_long_patterns else None)
+            for idx in entity_indices:
+                pattern = patterns[idx]
+                if (grams is not None and len(pattern.pattern_text) >= _PREFILTER_GRAM
+                        and pattern.pattern_text[:_PREFILTER_GRAM] not in grams):
+                    continue
+                counts[idx] += self._count_entity_pattern(text, pattern)
+        
+        return np.array(counts, dtype=np.int64)
+    
+    def _count_entity_pattern(self, text: str, pattern: Pattern) -> int:
+        """统计实体模式的匹配数：模式之后20个字符内存在词语（非空白字符）即视为一次匹配"""
+        pattern_text = pattern.pattern_text
+        pattern_len = len(pattern_text)
+        count = 0
+        for pos in self._iter_positions(text, pattern_text):
+            start = pos + pattern_len
+            following = text[start:start + 20]
+            if following and not following.isspace():
+                count += 1
+        return count
     
     def _test_relation_pattern(self, text: str, pattern: Pattern) -> List[Tuple[str, str]]:
         """测试关系模式"""
@@ -352,28 +509,22 @@ class PatternExtractor:
     
     def export_patterns(self, patterns: List[Pattern], filepath: str):
         """导出学习到的模式"""
-        import json
-        
-        pattern_data = []
-        for pattern in patterns:
-            pattern_data.append({
-                'pattern_text': pattern.pattern_text,
-                'pattern_type': pattern.pattern_type,
-                'target_type': pattern.target_type,
-                'confidence': pattern.confidence,
-                'frequency': pattern.frequency,
-                'examples': pattern.examples
-            })
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(pattern_data, f, ensure_ascii=False, indent=2)
+        pattern_data = [{
+            'pattern_text': pattern.pattern_text,
+            'pattern_type': pattern.pattern_type,
+            'target_type': pattern.target_type,
+            'confidence': pattern.confidence,
+            'frequency': pattern.frequency,
+            'examples': pattern.examples
+        } for pattern in patterns]
+        
+        with open(filepath, 'wb') as f:
+            f.write(dumps_json(pattern_data))
     
     def load_patterns(self, filepath: str) -> List[Pattern]:
         """加载模式"""
-        import json
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            pattern_data = json.load(f)
+        with open(filepath, 'rb') as f:
+            pattern_data = loads_json(f.read())
         
         patterns = []
         for data in pattern_data:
@@ -409,4 +560,29 @@ class PatternExtractor:
             for pattern in relation_patterns:
                 print(f"  - [{pattern.target_type}] '{pattern.pattern_text}' "
                       f"(置信度: {pattern.confidence:.2f}, 频次: {pattern.frequency})")
-                print(f"    示例: {', '.join(pattern.examples[:3])}")
\ No newline at end of file
+                print(f"    示例: {', '.join(pattern.examples[:3])}")
+
+
+def _collect_entity_contexts(extractor: PatternExtractor, texts: List[str],
+                             entities: List[List[ExtractedEntity]]) -> Dict[str, Dict[str, List[str]]]:
+    """收集各实体类型的上下文（进程池中按文本块调用）"""
+    # 每种实体类型存放并列的实体名、前文、后文列表，不为每条上下文建字典
+    entity_contexts = defaultdict(lambda: {'entity': [], 'before': [], 'after': []})
+    
+    for text, text_entities in zip(texts, entities):
+        # 同一文本中位置相同的实体（重复抽取）复用已切出的上下文
+        window_cache = {}
+        for entity in text_entities:
+            span = (entity.start_pos, entity.end_pos)
+            window = window_cache.get(span)
+            if window is None:
+                window = window_cache[span] = extractor._get_entity_context(text, entity)
+            before, after = window
+            # 类型字符串驻留后，字典键比较退化为指针比较
+            contexts = entity_contexts[sys.intern(entity.type)]
+            contexts['entity'].append(entity.text)
+            contexts['before'].append(before)
+            contexts['after'].append(after)
+    
+    # defaultdict的默认工厂是lambda，无法跨进程序列化
+    return dict(entity_contexts)
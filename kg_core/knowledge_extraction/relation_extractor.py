@@ -18,6 +18,8 @@ class ExtractedRelation:
     context: str
     start_pos: int = 0
     end_pos: int = 0
+    head_pos: int = -1  # 头实体在文本中的起始位置，-1表示未知
+    tail_pos: int = -1  # 尾实体在文本中的起始位置，-1表示未知
 
 
 class RelationExtractor:
@@ -217,7 +219,9 @@ class RelationExtractor:
                         confidence=confidence,
                         context=text[entity1.start_pos:entity2.end_pos],
                         start_pos=entity1.start_pos,
-                        end_pos=entity2.end_pos
+                        end_pos=entity2.end_pos,
+                        head_pos=entity1.start_pos,
+                        tail_pos=entity2.start_pos
                     )
                     relations.append(relation)
         
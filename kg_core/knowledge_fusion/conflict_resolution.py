@@ -1,13 +1,25 @@
 """
 冲突解决模块 - 处理知识融合过程中的冲突
 """
-from typing import List, Dict, Tuple, Optional, Any, Set
+from functools import lru_cache
+from typing import List, Dict, Tuple, Optional, Any, Set, Iterable, FrozenSet, Callable, NamedTuple
 from dataclasses import dataclass
 from enum import Enum
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, deque
+from itertools import islice
+from operator import attrgetter, itemgetter
 import logging
+import numpy as np
+import pandas as pd
 from ..entity_definition.entity_types import Entity
 from ..entity_definition.relation_types import Relation
+from ..utils.performance import DATACLASS_SLOTS, mean_f64
+
+try:
+    # 可选依赖：用于JIT编译同ID实体分组的冲突标记内核
+    from numba import njit
+except ImportError:
+    njit = None
 
 
 class ConflictType(Enum):
@@ -20,7 +32,120 @@ class ConflictType(Enum):
     CONTRADICTORY_RELATIONS = "contradictory_relations"
 
 
-@dataclass
+_get_type = attrgetter('type')
+_get_count = itemgetter(1)
+
+# 冲突报告的分隔线
+_REPORT_RULE = "=" * 50
+
+# 矛盾关系对
+_CONTRADICTORY_PAIRS = frozenset({
+    frozenset({'parent_of', 'child_of'}),
+    frozenset({'spouse_of', 'sibling_of'}),
+    frozenset({'works_for', 'competes_with'}),
+    frozenset({'located_in', 'not_located_in'})
+})
+
+
+def _build_contradictory_index(pairs: FrozenSet[FrozenSet[str]]) -> Dict[str, FrozenSet[str]]:
+    """构建关系类型到其矛盾类型集合的索引"""
+    index = defaultdict(set)
+    for pair in pairs:
+        for relation_type in pair:
+            index[relation_type].update(pair - {relation_type})
+    return {relation_type: frozenset(others) for relation_type, others in index.items()}
+
+
+_CONTRADICTORY_INDEX = _build_contradictory_index(_CONTRADICTORY_PAIRS)
+
+
+def _argmax(values: List[float]) -> int:
+    """单次遍历返回最大值的下标（并列时取第一个）"""
+    return max(range(len(values)), key=values.__getitem__)
+
+
+def _has_distinct(items: Iterable[Any]) -> bool:
+    """判断是否存在至少两个不同的元素，遇到第一个不同元素即返回，不构建集合"""
+    iterator = iter(items)
+    first = next(iterator, None)
+    for item in iterator:
+        if item != first:
+            return True
+    return False
+
+
+@lru_cache(maxsize=4096)
+def _most_frequent_index(items: Tuple[Any, ...]) -> Tuple[int, float]:
+    """出现次数最多的候选项的下标（首次出现处）及其占比（带缓存，重复的候选组无需重新计数）"""
+    # 单次遍历取计数最大项（并列取先出现者，与most_common(1)一致），不经过堆与结果列表
+    item, count = max(Counter(items).items(), key=_get_count)
+    return items.index(item), count / len(items)
+
+
+@lru_cache(maxsize=4096)
+def _longest_index(items: Tuple[Any, ...]) -> int:
+    """最长候选项的下标（并列时取第一个，带缓存）"""
+    return max(range(len(items)), key=lambda i: len(items[i]))
+
+
+def _cached_index(kernel: Callable, items: List[Any]):
+    """以候选项元组调用带缓存的内核；候选项不可哈希时绕过缓存直接计算
+
+    内核只返回下标，取值仍从原列表读取，相等但类型不同的候选项（如1与1.0）不会因缓存串值。
+    """
+    items = tuple(items)
+    try:
+        return kernel(items)
+    except TypeError:
+        return kernel.__wrapped__(items)
+
+
+def _group_conflict_flags_kernel(id_codes, name_codes, type_codes, num_groups):
+    """单次遍历统计各ID组的实体数，并与组内第一个实体比较标记名称/类型冲突"""
+    counts = np.zeros(num_groups, dtype=np.int64)
+    first = np.zeros(num_groups, dtype=np.int64)
+    name_conflicts = np.zeros(num_groups, dtype=np.bool_)
+    type_conflicts = np.zeros(num_groups, dtype=np.bool_)
+    for i in range(id_codes.shape[0]):
+        group = id_codes[i]
+        if counts[group] == 0:
+            first[group] = i
+        else:
+            head = first[group]
+            if name_codes[i] != name_codes[head]:
+                name_conflicts[group] = True
+            if type_codes[i] != type_codes[head]:
+                type_conflicts[group] = True
+        counts[group] += 1
+    return counts, name_conflicts, type_conflicts
+
+
+_group_conflict_flags = (njit(cache=True)(_group_conflict_flags_kernel)
+                         if njit is not None else None)
+
+
+def _group_conflict_flags_numpy(id_codes, name_codes, type_codes, num_groups):
+    """_group_conflict_flags_kernel的NumPy向量化版本（未安装numba时使用）"""
+    counts = np.bincount(id_codes, minlength=num_groups)
+    first = np.empty(num_groups, dtype=np.intp)
+    first[id_codes[::-1]] = np.arange(id_codes.shape[0] - 1, -1, -1)  # 倒序赋值，保留首次出现的下标
+    first_of_entity = first[id_codes]
+    name_conflicts = np.bincount(id_codes, weights=name_codes != name_codes[first_of_entity],
+                                 minlength=num_groups) > 0
+    type_conflicts = np.bincount(id_codes, weights=type_codes != type_codes[first_of_entity],
+                                 minlength=num_groups) > 0
+    return counts, name_conflicts, type_conflicts
+
+
+class _EntityBatch(NamedTuple):
+    """实体列表的列式（SoA）视图"""
+    ids: np.ndarray
+    names: np.ndarray
+    types: np.ndarray
+    props: List[Dict[str, Any]]
+
+
+@dataclass(**DATACLASS_SLOTS)
 class Conflict:
     """冲突"""
     conflict_id: str
@@ -36,10 +161,25 @@ class Conflict:
 class ConflictResolver:
     """冲突解决器"""
     
-    def __init__(self):
+    # 实体冲突检测改用列式向量化比较的实体数阈值
+    SOA_THRESHOLD = 256
+    
+    # 冲突解决历史默认保留的最大条数（超出后丢弃最早的记录）
+    MAX_HISTORY = 10_000
+    
+    def __init__(self, max_history: Optional[int] = MAX_HISTORY):
         self.resolution_strategies = self._build_resolution_strategies()
-        self.conflict_history = []
+        self.strategy_handlers = self._build_strategy_handlers()
+        # 有界队列，长期运行时内存不随解决次数无限增长；max_history为None表示不限
+        self.conflict_history = deque(maxlen=max_history)
         self.logger = logging.getLogger(__name__)
+        # 冲突历史的累计统计，随记录/淘汰/重新解决增量维护，统计历史时无需遍历
+        # 同一冲突对象可在历史中出现多次：按id记录 [出现次数, 最近一次计入的统计快照]
+        self._history_entries: Dict[int, List[Any]] = {}
+        self._history_by_type = Counter()
+        self._history_resolved_count = 0
+        self._history_total_confidence = 0.0
+        self._history_high_confidence = 0
     
     def _build_resolution_strategies(self) -> Dict[ConflictType, List[str]]:
         """构建冲突解决策略"""
@@ -85,9 +225,14 @@ class ConflictResolver:
     
     def detect_entity_conflicts(self, entities: List[Entity]) -> List[Conflict]:
         """检测实体冲突"""
+        if len(entities) >= self.SOA_THRESHOLD:
+            batch = self._to_soa(entities)
+            if batch is not None:
+                return self._detect_entity_conflicts_soa(batch)
+        
         conflicts = []
         
-        # 按ID分组实体
+        # 按ID分组实体（哈希分组保持ID首次出现的顺序，比排序分组更快）
         entity_groups = defaultdict(list)
         for entity in entities:
             entity_groups[entity.id].append(entity)
@@ -97,50 +242,116 @@ class ConflictResolver:
             if len(group) <= 1:
                 continue
             
-            # 检测名称冲突
-            names = [entity.name for entity in group]
-            if len(set(names)) > 1:
-                conflict = Conflict(
-                    conflict_id=f"name_conflict_{entity_id}",
-                    conflict_type=ConflictType.ENTITY_NAME_CONFLICT,
-                    description=f"实体 {entity_id} 有多个不同的名称",
-                    conflicting_items=names,
-                    confidence_scores=[1.0] * len(names)  # 简化处理
-                )
-                conflicts.append(conflict)
-            
-            # 检测类型冲突
-            types = [entity.type for entity in group]
-            if len(set(types)) > 1:
-                conflict = Conflict(
-                    conflict_id=f"type_conflict_{entity_id}",
-                    conflict_type=ConflictType.ENTITY_TYPE_CONFLICT,
-                    description=f"实体 {entity_id} 有多个不同的类型",
-                    conflicting_items=types,
-                    confidence_scores=[1.0] * len(types)
-                )
-                conflicts.append(conflict)
+            # 一次遍历同时检查名称、类型是否不同并收集属性值
+            first_name, first_type = group[0].name, group[0].type
+            name_conflict = type_conflict = False
+            all_properties = defaultdict(list)
+            for entity in group:
+                if not name_conflict and entity.name != first_name:
+                    name_conflict = True
+                if not type_conflict and entity.type != first_type:
+                    type_conflict = True
+                if entity.properties:
+                    for key, value in entity.properties.items():
+                        all_properties[key].append(value)
             
-            # 检测属性值冲突
-            property_conflicts = self._detect_property_conflicts(group, entity_id)
-            conflicts.extend(property_conflicts)
+            # 确认存在不同名称/类型后才构建对应列表
+            names = [entity.name for entity in group] if name_conflict else None
+            types = [entity.type for entity in group] if type_conflict else None
+            self._add_entity_group_conflicts(conflicts, entity_id, names, types, all_properties)
         
         return conflicts
     
-    def _detect_property_conflicts(self, entities: List[Entity], entity_id: str) -> List[Conflict]:
-        """检测属性值冲突"""
+    @staticmethod
+    def _to_soa(entities: List[Entity]) -> Optional[_EntityBatch]:
+        """将实体列表转换为列式视图，ID、名称、类型不全是字符串时返回None"""
+        ids = [entity.id for entity in entities]
+        names = [entity.name for entity in entities]
+        types = [entity.type for entity in entities]
+        # 只对字符串列做哈希编码，避免None/NaN等特殊值的相等语义与逐个比较不一致
+        if set(map(type, ids)) | set(map(type, names)) | set(map(type, types)) != {str}:
+            return None
+        return _EntityBatch(np.array(ids, dtype=object), np.array(names, dtype=object),
+                            np.array(types, dtype=object), [entity.properties for entity in entities])
+    
+    def _detect_entity_conflicts_soa(self, batch: _EntityBatch) -> List[Conflict]:
+        """在列式视图上检测实体冲突，结果与逐组检测一致"""
         conflicts = []
         
-        # 收集所有属性键
-        all_properties = defaultdict(list)
-        for entity in entities:
-            if entity.properties:
-                for key, value in entity.properties.items():
-                    all_properties[key].append(value)
+        # 哈希编码：组号按ID首次出现的顺序分配，与逐组检测的分组顺序一致
+        codes, unique_ids = pd.factorize(batch.ids)
+        name_codes = pd.factorize(batch.names)[0]
+        type_codes = pd.factorize(batch.types)[0]
+        
+        # 与组内第一个实体比较，标记存在不同名称/类型的组（优先用JIT编译的单次遍历内核）
+        flags = _group_conflict_flags if _group_conflict_flags is not None else _group_conflict_flags_numpy
+        counts, name_conflicts, type_conflicts = flags(
+            codes.astype(np.int64, copy=False), name_codes.astype(np.int64, copy=False),
+            type_codes.astype(np.int64, copy=False), len(unique_ids)
+        )
+        
+        # 各组成员下标（组内保持原始顺序），后续逐组处理改用Python列表避免逐组的数组索引开销
+        members = np.argsort(codes, kind='stable').tolist()
+        ends = np.cumsum(counts).tolist()
+        multi_groups = np.flatnonzero(counts > 1).tolist()
+        name_conflicts = name_conflicts.tolist()
+        type_conflicts = type_conflicts.tolist()
+        counts = counts.tolist()
+        all_names, all_types, props = batch.names.tolist(), batch.types.tolist(), batch.props
+        
+        for group in multi_groups:
+            indices = members[ends[group] - counts[group]:ends[group]]
+            all_properties = defaultdict(list)
+            for index in indices:
+                properties = props[index]
+                if properties:
+                    for key, value in properties.items():
+                        all_properties[key].append(value)
+            
+            names = [all_names[index] for index in indices] if name_conflicts[group] else None
+            types = [all_types[index] for index in indices] if type_conflicts[group] else None
+            self._add_entity_group_conflicts(conflicts, unique_ids[group], names, types, all_properties)
+        
+        return conflicts
+    
+    def _add_entity_group_conflicts(self, conflicts: List[Conflict], entity_id: str,
+                                    names: Optional[List[str]], types: Optional[List[str]],
+                                    all_properties: Dict[str, List[Any]]):
+        """为一组同ID实体追加名称、类型和属性值冲突（names/types为None表示无冲突）"""
+        # 检测名称冲突
+        if names is not None:
+            conflict = Conflict(
+                conflict_id=f"name_conflict_{entity_id}",
+                conflict_type=ConflictType.ENTITY_NAME_CONFLICT,
+                description=f"实体 {entity_id} 有多个不同的名称",
+                conflicting_items=names,
+                confidence_scores=[1.0] * len(names)  # 简化处理
+            )
+            conflicts.append(conflict)
+        
+        # 检测类型冲突
+        if types is not None:
+            conflict = Conflict(
+                conflict_id=f"type_conflict_{entity_id}",
+                conflict_type=ConflictType.ENTITY_TYPE_CONFLICT,
+                description=f"实体 {entity_id} 有多个不同的类型",
+                conflicting_items=types,
+                confidence_scores=[1.0] * len(types)
+            )
+            conflicts.append(conflict)
+        
+        # 检测属性值冲突
+        property_conflicts = self._detect_property_conflicts(all_properties, entity_id)
+        conflicts.extend(property_conflicts)
+    
+    def _detect_property_conflicts(self, all_properties: Dict[str, List[Any]],
+                                   entity_id: str) -> List[Conflict]:
+        """检测属性值冲突（all_properties为属性键到各实体取值列表的映射）"""
+        conflicts = []
         
         # 检查每个属性的冲突
         for prop_key, values in all_properties.items():
-            if len(set(str(v) for v in values)) > 1:  # 转换为字符串比较
+            if _has_distinct(map(str, values)):  # 转换为字符串比较
                 conflict = Conflict(
                     conflict_id=f"property_conflict_{entity_id}_{prop_key}",
                     conflict_type=ConflictType.PROPERTY_VALUE_CONFLICT,
@@ -156,7 +367,7 @@ class ConflictResolver:
         """检测关系冲突"""
         conflicts = []
         
-        # 按实体对分组关系
+        # 按实体对分组关系（同上，保持实体对首次出现的顺序）
         relation_groups = defaultdict(list)
         for relation in relations:
             key = (relation.head_entity_id, relation.tail_entity_id)
@@ -168,8 +379,8 @@ class ConflictResolver:
                 continue
             
             # 检测关系类型冲突
-            types = [relation.type for relation in group]
-            if len(set(types)) > 1:
+            if _has_distinct(map(_get_type, group)):
+                types = [relation.type for relation in group]
                 # 检查是否为矛盾关系
                 if self._are_contradictory_relations(types):
                     conflict = Conflict(
@@ -194,26 +405,100 @@ class ConflictResolver:
     
     def _are_contradictory_relations(self, relation_types: List[str]) -> bool:
         """判断关系类型是否矛盾"""
-        # 定义矛盾关系对
-        contradictory_pairs = {
-            ('parent_of', 'child_of'),
-            ('spouse_of', 'sibling_of'),
-            ('works_for', 'competes_with'),
-            ('located_in', 'not_located_in')
-        }
-        
-        # 检查是否存在矛盾对
+        # 检查是否存在矛盾对：任一类型的矛盾类型出现在集合中即可
         type_set = set(relation_types)
-        for pair in contradictory_pairs:
-            if pair[0] in type_set and pair[1] in type_set:
-                return True
-            if pair[1] in type_set and pair[0] in type_set:
-                return True
-        
-        return False
+        return any(not _CONTRADICTORY_INDEX[relation_type].isdisjoint(type_set)
+                   for relation_type in type_set if relation_type in _CONTRADICTORY_INDEX)
+    
+    def _build_strategy_handlers(self) -> Dict[ConflictType, Dict[str, Callable[[Conflict], Conflict]]]:
+        """构建 冲突类型 -> 策略 -> 解决方法 的分派表，未列出的策略默认选择第一项"""
+        return {
+            ConflictType.ENTITY_NAME_CONFLICT: {
+                'highest_confidence': self._resolve_by_top_confidence,
+                'most_frequent': self._resolve_by_most_frequent,
+                'longest_name': self._resolve_by_longest_name
+            },
+            ConflictType.ENTITY_TYPE_CONFLICT: {
+                'highest_confidence': self._resolve_by_top_confidence,
+                'most_specific_type': self._resolve_by_most_specific_type,
+                'vote': self._resolve_by_most_frequent
+            },
+            ConflictType.PROPERTY_VALUE_CONFLICT: {
+                'highest_confidence': self._resolve_by_top_confidence,
+                'vote': self._resolve_property_by_vote,
+                'average_numeric': self._resolve_property_by_average,
+                'union_lists': self._resolve_property_by_union
+            },
+            ConflictType.RELATION_TYPE_CONFLICT: {
+                'highest_confidence': self._resolve_by_top_confidence,
+                'most_frequent': self._resolve_by_most_frequent
+            },
+            ConflictType.CONTRADICTORY_RELATIONS: {
+                'highest_confidence': self._resolve_by_top_confidence,
+                'source_authority': self._resolve_by_source_authority
+            }
+        }
     
     def resolve_conflict(self, conflict: Conflict, strategy: str = None) -> Conflict:
         """解决冲突"""
+        conflict, succeeded = self._apply_resolution(conflict, strategy)
+        
+        # 重新解决历史中已有的冲突：其各次出现都要改按新的结果计入
+        entry = self._history_entries.get(id(conflict))
+        if entry is not None:
+            count, previous = entry
+            snapshot = self._history_snapshot(conflict)
+            self._update_history_stats(previous, -count)
+            self._update_history_stats(snapshot, count)
+            entry[1] = snapshot
+        
+        # 记录解决历史
+        if succeeded:
+            self._record_history(conflict)
+        
+        return conflict
+    
+    def _record_history(self, conflict: Conflict):
+        """追加冲突到解决历史，同步更新累计统计（队列已满时先扣除被淘汰的最早记录）"""
+        history = self.conflict_history
+        entries = self._history_entries
+        if history.maxlen is not None and len(history) == history.maxlen:
+            if not history.maxlen:
+                return
+            evicted = entries[id(history[0])]
+            self._update_history_stats(evicted[1], -1)
+            evicted[0] -= 1
+            if not evicted[0]:
+                del entries[id(history[0])]
+        history.append(conflict)
+        entry = entries.get(id(conflict))
+        if entry is None:
+            entry = entries[id(conflict)] = [0, self._history_snapshot(conflict)]
+        entry[0] += 1
+        self._update_history_stats(entry[1], 1)
+    
+    @staticmethod
+    def _history_snapshot(conflict: Conflict) -> Tuple[str, bool, float]:
+        """冲突计入统计的取值快照：(类型, 是否已解决, 解决置信度)"""
+        return (conflict.conflict_type.value, conflict.resolved_value is not None,
+                conflict.resolution_confidence)
+    
+    def _update_history_stats(self, snapshot: Tuple[str, bool, float], weight: int):
+        """按weight（正为计入，负为扣除）调整冲突历史的累计统计"""
+        type_value, resolved, confidence = snapshot
+        self._history_by_type[type_value] += weight
+        if not self._history_by_type[type_value]:
+            del self._history_by_type[type_value]
+        if resolved:
+            self._history_resolved_count += weight
+            self._history_total_confidence += weight * confidence
+            if confidence > 0.8:
+                self._history_high_confidence += weight
+            if not self._history_resolved_count:
+                self._history_total_confidence = 0.0  # 清零，避免加减累积的浮点误差残留
+    
+    def _apply_resolution(self, conflict: Conflict, strategy: str = None) -> Tuple[Conflict, bool]:
+        """解决单个冲突但不记录历史，返回冲突及是否按策略成功解决"""
         if not strategy:
             # 选择默认策略
             available_strategies = self.resolution_strategies.get(conflict.conflict_type, [])
@@ -222,181 +507,106 @@ class ConflictResolver:
         conflict.resolution_strategy = strategy
         
         try:
-            if conflict.conflict_type == ConflictType.ENTITY_NAME_CONFLICT:
-                conflict = self._resolve_name_conflict(conflict, strategy)
-            
-            elif conflict.conflict_type == ConflictType.ENTITY_TYPE_CONFLICT:
-                conflict = self._resolve_type_conflict(conflict, strategy)
-            
-            elif conflict.conflict_type == ConflictType.PROPERTY_VALUE_CONFLICT:
-                conflict = self._resolve_property_conflict(conflict, strategy)
-            
-            elif conflict.conflict_type == ConflictType.RELATION_TYPE_CONFLICT:
-                conflict = self._resolve_relation_type_conflict(conflict, strategy)
-            
-            elif conflict.conflict_type == ConflictType.CONTRADICTORY_RELATIONS:
-                conflict = self._resolve_contradictory_relations(conflict, strategy)
-            
-            else:
+            handlers = self.strategy_handlers.get(conflict.conflict_type)
+            if handlers is None:
                 # 默认使用最高置信度策略
                 conflict = self._resolve_by_highest_confidence(conflict)
-            
-            # 记录解决历史
-            self.conflict_history.append(conflict)
+            else:
+                conflict = handlers.get(strategy, self._resolve_by_first_item)(conflict)
             
         except Exception as e:
             self.logger.error(f"解决冲突 {conflict.conflict_id} 时出错: {e}")
             conflict.resolved_value = conflict.conflicting_items[0]  # 默认选择第一个
             conflict.resolution_confidence = 0.1
+            return conflict, False
         
-        return conflict
+        return conflict, True
     
-    def _resolve_name_conflict(self, conflict: Conflict, strategy: str) -> Conflict:
-        """解决名称冲突"""
-        names = conflict.conflicting_items
+    def _resolve_by_top_confidence(self, conflict: Conflict) -> Conflict:
+        """选择置信度最高的候选项"""
         confidences = conflict.confidence_scores
-        
-        if strategy == 'highest_confidence':
-            max_idx = confidences.index(max(confidences))
-            conflict.resolved_value = names[max_idx]
-            conflict.resolution_confidence = confidences[max_idx]
-        
-        elif strategy == 'most_frequent':
-            name_counts = Counter(names)
-            most_common = name_counts.most_common(1)[0]
-            conflict.resolved_value = most_common[0]
-            conflict.resolution_confidence = most_common[1] / len(names)
-        
-        elif strategy == 'longest_name':
-            longest_name = max(names, key=len)
-            conflict.resolved_value = longest_name
-            conflict.resolution_confidence = 0.7  # 中等置信度
-        
-        else:
-            # 默认策略
-            conflict.resolved_value = names[0]
-            conflict.resolution_confidence = 0.5
-        
+        max_idx = _argmax(confidences)
+        conflict.resolved_value = conflict.conflicting_items[max_idx]
+        conflict.resolution_confidence = confidences[max_idx]
         return conflict
     
-    def _resolve_type_conflict(self, conflict: Conflict, strategy: str) -> Conflict:
-        """解决类型冲突"""
-        types = conflict.conflicting_items
-        confidences = conflict.confidence_scores
-        
-        if strategy == 'highest_confidence':
-            max_idx = confidences.index(max(confidences))
-            conflict.resolved_value = types[max_idx]
-            conflict.resolution_confidence = confidences[max_idx]
-        
-        elif strategy == 'most_specific_type':
-            # 选择最具体的类型（简化为最长的类型名）
-            most_specific = max(types, key=len)
-            conflict.resolved_value = most_specific
-            conflict.resolution_confidence = 0.8
-        
-        elif strategy == 'vote':
-            type_counts = Counter(types)
-            most_common = type_counts.most_common(1)[0]
-            conflict.resolved_value = most_common[0]
-            conflict.resolution_confidence = most_common[1] / len(types)
-        
-        else:
-            conflict.resolved_value = types[0]
-            conflict.resolution_confidence = 0.5
-        
+    def _resolve_by_most_frequent(self, conflict: Conflict) -> Conflict:
+        """选择出现次数最多的候选项（名称、类型、关系类型）"""
+        items = conflict.conflicting_items
+        index, confidence = _cached_index(_most_frequent_index, items)
+        conflict.resolved_value = items[index]
+        conflict.resolution_confidence = confidence
+        return conflict
+    
+    def _resolve_by_longest_name(self, conflict: Conflict) -> Conflict:
+        """选择最长的名称"""
+        items = conflict.conflicting_items
+        conflict.resolved_value = items[_cached_index(_longest_index, items)]
+        conflict.resolution_confidence = 0.7  # 中等置信度
+        return conflict
+    
+    def _resolve_by_most_specific_type(self, conflict: Conflict) -> Conflict:
+        """选择最具体的类型（简化为最长的类型名）"""
+        items = conflict.conflicting_items
+        conflict.resolved_value = items[_cached_index(_longest_index, items)]
+        conflict.resolution_confidence = 0.8
         return conflict
     
-    def _resolve_property_conflict(self, conflict: Conflict, strategy: str) -> Conflict:
-        """解决属性值冲突"""
+    def _resolve_property_by_vote(self, conflict: Conflict) -> Conflict:
+        """按字符串形式投票选择属性值"""
         values = conflict.conflicting_items
-        confidences = conflict.confidence_scores
+        value_counts = Counter(str(v) for v in values)
+        most_common_str, most_common_count = max(value_counts.items(), key=_get_count)
         
-        if strategy == 'highest_confidence':
-            max_idx = confidences.index(max(confidences))
-            conflict.resolved_value = values[max_idx]
-            conflict.resolution_confidence = confidences[max_idx]
-        
-        elif strategy == 'vote':
-            value_counts = Counter(str(v) for v in values)
-            most_common_str = value_counts.most_common(1)[0][0]
-            
-            # 找到对应的原始值
-            for value in values:
-                if str(value) == most_common_str:
-                    conflict.resolved_value = value
-                    break
-            
-            conflict.resolution_confidence = value_counts[most_common_str] / len(values)
-        
-        elif strategy == 'average_numeric':
-            # 尝试计算数值平均值
-            try:
-                numeric_values = [float(v) for v in values]
-                conflict.resolved_value = sum(numeric_values) / len(numeric_values)
-                conflict.resolution_confidence = 0.8
-            except (ValueError, TypeError):
-                # 不是数值，回退到投票策略
-                return self._resolve_property_conflict(conflict, 'vote')
-        
-        elif strategy == 'union_lists':
-            # 合并列表值
-            if all(isinstance(v, list) for v in values):
-                merged = []
-                for lst in values:
-                    merged.extend(lst)
-                conflict.resolved_value = list(set(merged))  # 去重
-                conflict.resolution_confidence = 0.9
-            else:
-                return self._resolve_property_conflict(conflict, 'vote')
-        
-        else:
-            conflict.resolved_value = values[0]
-            conflict.resolution_confidence = 0.5
+        # 找到对应的原始值
+        for value in values:
+            if str(value) == most_common_str:
+                conflict.resolved_value = value
+                break
         
+        conflict.resolution_confidence = most_common_count / len(values)
         return conflict
     
-    def _resolve_relation_type_conflict(self, conflict: Conflict, strategy: str) -> Conflict:
-        """解决关系类型冲突"""
-        types = conflict.conflicting_items
-        confidences = conflict.confidence_scores
-        
-        if strategy == 'highest_confidence':
-            max_idx = confidences.index(max(confidences))
-            conflict.resolved_value = types[max_idx]
-            conflict.resolution_confidence = confidences[max_idx]
-        
-        elif strategy == 'most_frequent':
-            type_counts = Counter(types)
-            most_common = type_counts.most_common(1)[0]
-            conflict.resolved_value = most_common[0]
-            conflict.resolution_confidence = most_common[1] / len(types)
-        
+    def _resolve_property_by_average(self, conflict: Conflict) -> Conflict:
+        """数值属性取平均值，非数值回退到投票"""
+        values = conflict.conflicting_items
+        try:
+            # 逐个float()转换，保持与内置float一致的取值与报错语义
+            numeric_values = np.fromiter(map(float, values), dtype=np.float64, count=len(values))
+        except (ValueError, TypeError):
+            # 不是数值，回退到投票策略
+            return self._resolve_property_by_vote(conflict)
+        
+        if mean_f64 is not None and numeric_values.shape[0]:
+            conflict.resolved_value = float(mean_f64(numeric_values))
         else:
-            conflict.resolved_value = types[0]
-            conflict.resolution_confidence = 0.5
-        
+            conflict.resolved_value = sum(numeric_values.tolist()) / len(numeric_values)
+        conflict.resolution_confidence = 0.8
         return conflict
     
-    def _resolve_contradictory_relations(self, conflict: Conflict, strategy: str) -> Conflict:
-        """解决矛盾关系"""
-        relations = conflict.conflicting_items
-        confidences = conflict.confidence_scores
-        
-        if strategy == 'highest_confidence':
-            max_idx = confidences.index(max(confidences))
-            conflict.resolved_value = relations[max_idx]
-            conflict.resolution_confidence = confidences[max_idx]
-        
-        elif strategy == 'source_authority':
-            # 简化处理：选择第一个关系
-            conflict.resolved_value = relations[0]
-            conflict.resolution_confidence = 0.6
-        
-        else:
-            conflict.resolved_value = relations[0]
-            conflict.resolution_confidence = 0.5
-        
+    def _resolve_property_by_union(self, conflict: Conflict) -> Conflict:
+        """合并列表属性值，非列表回退到投票"""
+        values = conflict.conflicting_items
+        if not all(isinstance(v, list) for v in values):
+            return self._resolve_property_by_vote(conflict)
+        
+        merged = set()
+        for lst in values:
+            merged.update(lst)  # 直接插入集合去重，不构建中间列表
+        conflict.resolved_value = list(merged)
+        conflict.resolution_confidence = 0.9
+        return conflict
+    
+    def _resolve_by_source_authority(self, conflict: Conflict) -> Conflict:
+        """按来源权威性选择（简化处理：选择第一个关系）"""
+        conflict.resolved_value = conflict.conflicting_items[0]
+        conflict.resolution_confidence = 0.6
+        return conflict
+    
+    def _resolve_by_first_item(self, conflict: Conflict) -> Conflict:
+        """默认策略：选择第一个候选项"""
+        conflict.resolved_value = conflict.conflicting_items[0]
+        conflict.resolution_confidence = 0.5
         return conflict
     
     def _resolve_by_highest_confidence(self, conflict: Conflict) -> Conflict:
@@ -405,7 +615,7 @@ class ConflictResolver:
             conflict.resolved_value = conflict.conflicting_items[0] if conflict.conflicting_items else None
             conflict.resolution_confidence = 0.5
         else:
-            max_idx = conflict.confidence_scores.index(max(conflict.confidence_scores))
+            max_idx = _argmax(conflict.confidence_scores)
             conflict.resolved_value = conflict.conflicting_items[max_idx]
             conflict.resolution_confidence = conflict.confidence_scores[max_idx]
         
@@ -414,69 +624,84 @@ class ConflictResolver:
     def batch_resolve_conflicts(self, conflicts: List[Conflict], 
                               strategy_mapping: Dict[ConflictType, str] = None) -> List[Conflict]:
         """批量解决冲突"""
-        resolved_conflicts = []
-        
-        for conflict in conflicts:
-            strategy = None
-            if strategy_mapping and conflict.conflict_type in strategy_mapping:
-                strategy = strategy_mapping[conflict.conflict_type]
-            
-            resolved_conflict = self.resolve_conflict(conflict, strategy)
-            resolved_conflicts.append(resolved_conflict)
-        
-        return resolved_conflicts
+        resolve = self.resolve_conflict
+        if not strategy_mapping:
+            return [resolve(conflict) for conflict in conflicts]
+        return [resolve(conflict, strategy_mapping.get(conflict.conflict_type))
+                for conflict in conflicts]
     
     def get_conflict_statistics(self, conflicts: List[Conflict]) -> Dict[str, Any]:
-        """获取冲突统计信息"""
-        stats = {
+        """获取冲突统计信息
+        
+        统计conflict_history时直接读取增量维护的累计值（经resolve_conflict重新解决的冲突会同步更新；
+        若绕过resolve_conflict直接修改历史中的冲突对象，累计值不会感知）；其他列表每次重新遍历。
+        """
+        if conflicts is self.conflict_history:
+            return self._history_statistics()
+        return self._compute_conflict_statistics(conflicts)
+    
+    def _history_statistics(self) -> Dict[str, Any]:
+        """由累计值生成冲突历史的统计快照"""
+        resolved_count = self._history_resolved_count
+        return {
+            'total_conflicts': len(self.conflict_history),
+            'by_type': self._history_by_type.copy(),
+            'resolved_count': resolved_count,
+            'high_confidence_resolutions': self._history_high_confidence,
+            'average_resolution_confidence': (self._history_total_confidence / resolved_count
+                                              if resolved_count > 0 else 0.0)
+        }
+    
+    def _compute_conflict_statistics(self, conflicts: List[Conflict]) -> Dict[str, Any]:
+        """遍历冲突列表计算统计信息"""
+        # 已解决冲突的置信度，计数与求和交给NumPy
+        confidences = np.fromiter(
+            (conflict.resolution_confidence for conflict in conflicts
+             if conflict.resolved_value is not None),
+            dtype=np.float64
+        )
+        resolved_count = int(confidences.size)
+        # 按顺序累加（cumsum），与逐个相加的结果一致；sum()为成对求和，末位可能不同
+        total_confidence = float(confidences.cumsum()[-1]) if resolved_count > 0 else 0.0
+        
+        return {
             'total_conflicts': len(conflicts),
-            'by_type': defaultdict(int),
-            'resolved_count': 0,
-            'high_confidence_resolutions': 0,  # > 0.8
-            'average_resolution_confidence': 0.0
+            'by_type': Counter([conflict.conflict_type.value for conflict in conflicts]),
+            'resolved_count': resolved_count,
+            'high_confidence_resolutions': int(np.count_nonzero(confidences > 0.8)),
+            'average_resolution_confidence': (total_confidence / resolved_count
+                                              if resolved_count > 0 else 0.0)
         }
-        
-        total_confidence = 0.0
-        
-        for conflict in conflicts:
-            stats['by_type'][conflict.conflict_type.value] += 1
-            
-            if conflict.resolved_value is not None:
-                stats['resolved_count'] += 1
-                total_confidence += conflict.resolution_confidence
-                
-                if conflict.resolution_confidence > 0.8:
-                    stats['high_confidence_resolutions'] += 1
-        
-        if stats['resolved_count'] > 0:
-            stats['average_resolution_confidence'] = total_confidence / stats['resolved_count']
-        
-        return stats
     
     def generate_conflict_report(self, conflicts: List[Conflict]) -> str:
         """生成冲突报告"""
         stats = self.get_conflict_statistics(conflicts)
         
-        report = f"冲突解决报告\n"
-        report += f"=" * 50 + "\n"
-        report += f"总冲突数: {stats['total_conflicts']}\n"
-        report += f"已解决: {stats['resolved_count']}\n"
-        report += f"平均解决置信度: {stats['average_resolution_confidence']:.2f}\n"
-        report += f"高置信度解决: {stats['high_confidence_resolutions']}\n\n"
-        
-        report += f"按类型分布:\n"
-        for conflict_type, count in stats['by_type'].items():
-            report += f"  {conflict_type}: {count}\n"
+        lines = [
+            "冲突解决报告",
+            _REPORT_RULE,
+            f"总冲突数: {stats['total_conflicts']}",
+            f"已解决: {stats['resolved_count']}",
+            f"平均解决置信度: {stats['average_resolution_confidence']:.2f}",
+            f"高置信度解决: {stats['high_confidence_resolutions']}",
+            "",
+            "按类型分布:"
+        ]
+        lines.extend(f"  {conflict_type}: {count}"
+                     for conflict_type, count in stats['by_type'].items())
         
         # 添加具体冲突示例
-        report += f"\n冲突示例:\n"
-        for i, conflict in enumerate(conflicts[:5]):
+        lines.append("")
+        lines.append("冲突示例:")
+        for i, conflict in enumerate(islice(conflicts, 5)):  # 兼容deque形式的冲突历史
             status = "已解决" if conflict.resolved_value is not None else "未解决"
-            report += f"  {i+1}. {conflict.description} - {status}\n"
+            lines.append(f"  {i+1}. {conflict.description} - {status}")
             if conflict.resolved_value is not None:
-                report += f"     解决方案: {conflict.resolved_value} (置信度: {conflict.resolution_confidence:.2f})\n"
+                lines.append(f"     解决方案: {conflict.resolved_value} (置信度: {conflict.resolution_confidence:.2f})")
         
-        return report
+        # 每行以换行结尾
+        lines.append("")
+        return "\n".join(lines)
     
     def print_conflict_summary(self, conflicts: List[Conflict]):
         """打印冲突摘要"""
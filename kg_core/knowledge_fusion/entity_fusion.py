@@ -1,15 +1,120 @@
 """
 实体融合模块 - 合并来自不同源的实体信息
 """
-from typing import List, Dict, Tuple, Optional, Set
+import os
+import sys
+from typing import List, Dict, Tuple, Optional, Set, Iterator, Any
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import defaultdict, Counter
+from itertools import chain, combinations
 import uuid
+import numpy as np
 from ..entity_definition.entity_types import Entity
 from ..knowledge_mapping.similarity_calculator import SimilarityCalculator
+from ..utils.performance import DATACLASS_SLOTS, UnionFind, mean_f64
+
+try:
+    # 可选依赖：用于JIT编译代表实体评分内核
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _entity_similarity_bounds(names: List[str], types: List[str]) -> np.ndarray:
+    """SimilarityCalculator.entity_similarity的逐对上界矩阵
+    
+    名称按combined相似度的各分量取上界：Levenshtein相似度不超过短长长度比，LCS相似度不超过
+    2*短/(长+短)，Jaccard取1，字符频率余弦与逐对计算一致（一次矩阵乘法得到）；类型逐对比较；
+    属性与别名相似度取1。
+    """
+    n = len(names)
+    lowered = [name.lower() for name in names]
+    vocab: Dict[str, int] = {}
+    for text in lowered:
+        for char in text:
+            vocab.setdefault(char, len(vocab))
+    
+    freq = np.zeros((n, max(len(vocab), 1)), dtype=np.float64)
+    for row, text in enumerate(lowered):
+        for char, count in Counter(text).items():
+            freq[row, vocab[char]] = count
+    
+    norms = np.linalg.norm(freq, axis=1)
+    safe_norms = np.where(norms > 0, norms, 1.0)
+    cosine = (freq @ freq.T) / np.outer(safe_norms, safe_norms)
+    
+    lengths = np.fromiter(map(len, names), dtype=np.float64, count=n)
+    shorter = np.minimum.outer(lengths, lengths)
+    longer = np.maximum.outer(lengths, lengths)
+    # 两者均为空串时不会进入combined计算，上界取1即可
+    levenshtein = np.divide(shorter, longer, out=np.ones_like(shorter), where=longer > 0)
+    total = shorter + longer
+    lcs = np.divide(2.0 * shorter, total, out=np.ones_like(total), where=total > 0)
+    name_bound = levenshtein * 0.3 + 0.3 + cosine * 0.2 + lcs * 0.2
+    
+    type_codes = np.unique(np.array(types, dtype=object), return_inverse=True)[1]
+    type_match = type_codes[:, None] == type_codes[None, :]
+    return name_bound * 0.4 + type_match * 0.3 + 0.3
+
+
+def _score_entities_kernel(name_lens, prop_counts, alias_counts, confidences, name_weight):
+    """按 名称长度、属性数、别名数、来源置信度 顺序累加各实体的代表性得分"""
+    scores = np.empty(name_lens.shape[0], dtype=np.float64)
+    for i in range(name_lens.shape[0]):
+        score = 0.0
+        score += name_lens[i] * name_weight
+        score += prop_counts[i] * 0.2
+        score += alias_counts[i] * 0.1
+        score += confidences[i] * 0.5
+        scores[i] = score
+    return scores
+
+
+_score_entities = njit(cache=True)(_score_entities_kernel) if njit is not None else None
+
+
+def _uuid4_batch(count: int) -> List[str]:
+    """一次os.urandom调用生成count个UUID4字符串（格式与str(uuid.uuid4())一致）"""
+    data = os.urandom(16 * count)
+    return [str(uuid.UUID(bytes=data[offset:offset + 16], version=4))
+            for offset in range(0, 16 * count, 16)]
 
 
 @dataclass
+class _EntityArrays:
+    """实体列表的列式视图：各列按下标对齐，相似度计算所需的实体字典只构建一次"""
+    names: List[str]
+    types: List[str]
+    props: List[Dict[str, Any]]
+    aliases: List[List[str]]
+    dicts: List[Dict[str, Any]]
+    
+    @classmethod
+    def from_entities(cls, entities: List[Entity]) -> '_EntityArrays':
+        """一次遍历实体构建各列"""
+        names, types, props, aliases, dicts = [], [], [], [], []
+        for entity in entities:
+            entity_aliases = entity.aliases or []
+            names.append(entity.name)
+            types.append(entity.type)
+            props.append(entity.properties)
+            aliases.append(entity_aliases)
+            dicts.append({
+                'name': entity.name,
+                'type': entity.type,
+                'properties': entity.properties,
+                'aliases': entity_aliases
+            })
+        return cls(names, types, props, aliases, dicts)
+    
+    def take(self, indices: List[int]) -> '_EntityArrays':
+        """按下标取子集（只复制引用）"""
+        return _EntityArrays([self.names[i] for i in indices], [self.types[i] for i in indices],
+                             [self.props[i] for i in indices], [self.aliases[i] for i in indices],
+                             [self.dicts[i] for i in indices])
+
+
+@dataclass(**DATACLASS_SLOTS)
 class EntityCluster:
     """实体聚类"""
     cluster_id: str
@@ -19,7 +124,7 @@ class EntityCluster:
     fusion_method: str = ""
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class FusionResult:
     """融合结果"""
     fused_entity: Entity
@@ -31,10 +136,31 @@ class FusionResult:
 class EntityFusion:
     """实体融合器"""
     
+    # entity_similarity中类型不同的实体对得分上限：名称0.4 + 属性0.2 + 别名0.1（含浮点累加误差余量）
+    CROSS_TYPE_MAX_SIMILARITY = 0.7 + 1e-9
+    
+    # 块内实体数达到该值时，先以向量化上界矩阵排除不可能重复的实体对
+    VECTORIZE_THRESHOLD = 32
+    
+    # 上界比较的浮点误差余量
+    BOUND_TOLERANCE = 1e-9
+    
+    # 聚类/融合实体ID按批预生成的个数（每批一次os.urandom系统调用）
+    ID_BATCH_SIZE = 256
+    
     def __init__(self, similarity_threshold: float = 0.8):
         self.similarity_threshold = similarity_threshold
         self.similarity_calculator = SimilarityCalculator()
         self.fusion_rules = self._build_fusion_rules()
+        # 融合热路径用到的规则项预先展开为属性，避免逐次两级字典查找
+        self._prefer_longer = self.fusion_rules['name_selection']['prefer_longer']
+        self._type_strategy = self.fusion_rules['type_resolution']['strategy']
+        self._merge_lists = self.fusion_rules['property_fusion']['merge_lists']
+        self._dedup = self.fusion_rules['property_fusion']['deduplicate']
+        # 最近一次重复识别算过的实体对相似度，键为(i, j)且i < j，聚类结束后清空
+        self._sim_cache: Dict[Tuple[int, int], float] = {}
+        # 预生成的待用ID
+        self._id_pool: List[str] = []
     
     def _build_fusion_rules(self) -> Dict[str, Dict[str, any]]:
         """构建融合规则"""
@@ -61,69 +187,96 @@ class EntityFusion:
         }
         return rules
     
-    def identify_duplicate_entities(self, entities: List[Entity]) -> List[List[int]]:
-        """识别重复实体"""
+    def __getstate__(self) -> Dict[str, Any]:
+        """复制或序列化时不携带ID池（否则副本会发出重复ID）和相似度缓存"""
+        state = self.__dict__.copy()
+        state['_id_pool'] = []
+        state['_sim_cache'] = {}
+        return state
+    
+    def _new_id(self) -> str:
+        """取一个新的UUID4字符串，池空时按批补充"""
+        if not self._id_pool:
+            self._id_pool = _uuid4_batch(self.ID_BATCH_SIZE)
+        return self._id_pool.pop()
+    
+    def identify_duplicate_entities(self, entities: List[Entity],
+                                    arrays: Optional[_EntityArrays] = None) -> List[List[int]]:
+        """识别重复实体（arrays为调用方已构建的列式视图）"""
         if len(entities) <= 1:
             return []
         
         # 构建实体信息字典用于相似度计算
-        entity_dicts = []
-        for entity in entities:
-            entity_dict = {
-                'name': entity.name,
-                'type': entity.type,
-                'properties': entity.properties,
-                'aliases': entity.aliases or []
-            }
-            entity_dicts.append(entity_dict)
-        
-        # 计算相似度并找出重复项
-        duplicates = []
-        visited = set()
+        if arrays is None:
+            arrays = _EntityArrays.from_entities(entities)
+        entity_dicts = arrays.dicts
+        
+        # 相似度超过阈值的实体对合并到同一集合（A~B、B~C时A、B、C归为一类）
+        union_find = UnionFind(len(entities))
+        sim_cache = self._sim_cache = {}
+        for i, j in self._candidate_pairs(arrays):
+            similarity = sim_cache[i, j] = self.similarity_calculator.entity_similarity(
+                entity_dicts[i], entity_dicts[j]
+            )
+            
+            if similarity >= self.similarity_threshold:
+                union_find.union(i, j)
         
+        # 按根节点分组，组按最小下标排序、组内下标升序
+        groups = defaultdict(list)
         for i in range(len(entities)):
-            if i in visited:
+            groups[union_find.find(i)].append(i)
+        
+        return [group for group in groups.values() if len(group) > 1]
+    
+    def _candidate_pairs(self, arrays: _EntityArrays) -> Iterator[Tuple[int, int]]:
+        """生成需要计算相似度的实体对
+        
+        阈值高于不同类型实体的得分上限时，只有同类型实体可能重复，按类型分块后只比较块内实体对；
+        否则比较全部实体对。较大的块先按相似度上界矩阵过滤，只保留上界达到阈值的实体对。
+        """
+        if self.similarity_threshold <= self.CROSS_TYPE_MAX_SIMILARITY:
+            blocks = [list(range(len(arrays.names)))]
+        else:
+            type_blocks = defaultdict(list)
+            for i, entity_type in enumerate(arrays.types):
+                type_blocks[entity_type].append(i)
+            blocks = type_blocks.values()
+        
+        for block in blocks:
+            if len(block) < self.VECTORIZE_THRESHOLD:
+                yield from combinations(block, 2)
                 continue
             
-            duplicate_group = [i]
-            
-            for j in range(i + 1, len(entities)):
-                if j in visited:
-                    continue
-                
-                similarity = self.similarity_calculator.entity_similarity(
-                    entity_dicts[i], entity_dicts[j]
-                )
-                
-                if similarity >= self.similarity_threshold:
-                    duplicate_group.append(j)
-                    visited.add(j)
-            
-            if len(duplicate_group) > 1:
-                duplicates.append(duplicate_group)
-            
-            visited.add(i)
-        
-        return duplicates
+            bounds = _entity_similarity_bounds([arrays.names[i] for i in block],
+                                               [arrays.types[i] for i in block])
+            candidates = np.triu(bounds >= self.similarity_threshold - self.BOUND_TOLERANCE, k=1)
+            rows, cols = np.nonzero(candidates)
+            indices = np.asarray(block)
+            yield from zip(indices[rows].tolist(), indices[cols].tolist())
     
     def cluster_entities(self, entities: List[Entity]) -> List[EntityCluster]:
         """聚类实体"""
-        duplicate_groups = self.identify_duplicate_entities(entities)
+        # 列式视图只构建一次，重复识别、聚类置信度与代表实体选择共用
+        arrays = _EntityArrays.from_entities(entities)
+        duplicate_groups = self.identify_duplicate_entities(entities, arrays)
         clusters = []
         
         # 为每个重复组创建聚类
         for group_indices in duplicate_groups:
             group_entities = [entities[i] for i in group_indices]
+            group_arrays = arrays.take(group_indices)
             
             cluster = EntityCluster(
-                cluster_id=str(uuid.uuid4()),
+                cluster_id=self._new_id(),
                 entities=group_entities,
-                confidence=self._calculate_cluster_confidence(group_entities),
+                confidence=self._calculate_cluster_confidence(group_entities, group_arrays,
+                                                              group_indices),
                 fusion_method="similarity_based"
             )
             
             # 选择代表实体
-            cluster.representative_entity = self._select_representative_entity(group_entities)
+            cluster.representative_entity = self._select_representative_entity(group_entities, group_arrays)
             clusters.append(cluster)
         
         # 为未聚类的实体创建单独的聚类
@@ -134,7 +287,7 @@ class EntityFusion:
         for i, entity in enumerate(entities):
             if i not in clustered_indices:
                 cluster = EntityCluster(
-                    cluster_id=str(uuid.uuid4()),
+                    cluster_id=self._new_id(),
                     entities=[entity],
                     representative_entity=entity,
                     confidence=1.0,
@@ -142,71 +295,86 @@ class EntityFusion:
                 )
                 clusters.append(cluster)
         
+        # 相似度缓存只在本次聚类内有效，及时释放
+        self._sim_cache = {}
+        
         return clusters
     
-    def _calculate_cluster_confidence(self, entities: List[Entity]) -> float:
-        """计算聚类置信度"""
+    def _calculate_cluster_confidence(self, entities: List[Entity],
+                                      arrays: Optional[_EntityArrays] = None,
+                                      indices: Optional[List[int]] = None) -> float:
+        """计算聚类置信度
+        
+        arrays为这些实体的列式视图；indices为它们在最近一次重复识别输入中的升序下标，
+        给出时优先复用重复识别阶段已算过的相似度。
+        """
         if len(entities) == 1:
             return 1.0
         
-        # 计算实体间平均相似度
-        total_similarity = 0.0
-        comparisons = 0
-        
-        for i in range(len(entities)):
-            for j in range(i + 1, len(entities)):
-                entity_dict1 = {
-                    'name': entities[i].name,
-                    'type': entities[i].type,
-                    'properties': entities[i].properties,
-                    'aliases': entities[i].aliases or []
-                }
-                entity_dict2 = {
-                    'name': entities[j].name,
-                    'type': entities[j].type,
-                    'properties': entities[j].properties,
-                    'aliases': entities[j].aliases or []
-                }
-                
-                similarity = self.similarity_calculator.entity_similarity(
-                    entity_dict1, entity_dict2
-                )
-                total_similarity += similarity
-                comparisons += 1
-        
-        return total_similarity / comparisons if comparisons > 0 else 0.0
+        # 计算实体间平均相似度（每个实体的字典只构建一次）
+        entity_dicts = (arrays or _EntityArrays.from_entities(entities)).dicts
+        sim_cache = self._sim_cache if indices is not None else {}
+        similarities = []
+        for i, j in combinations(range(len(entities)), 2):
+            similarity = sim_cache.get((indices[i], indices[j])) if sim_cache else None
+            if similarity is None:
+                # 候选过滤跳过的实体对（或未给出下标）才重新计算
+                similarity = self.similarity_calculator.entity_similarity(entity_dicts[i], entity_dicts[j])
+            similarities.append(similarity)
+        
+        if not similarities:
+            return 0.0
+        if mean_f64 is not None:
+            return float(mean_f64(np.array(similarities, dtype=np.float64)))
+        return sum(similarities) / len(similarities)
     
-    def _select_representative_entity(self, entities: List[Entity]) -> Entity:
-        """选择代表实体"""
+    def _select_representative_entity(self, entities: List[Entity],
+                                      arrays: Optional[_EntityArrays] = None) -> Entity:
+        """选择代表实体（arrays为这些实体的列式视图）"""
         if len(entities) == 1:
             return entities[0]
         
-        # 评分标准
-        scores = []
+        if _score_entities is not None:
+            # 从列式视图抽取评分所需的数值列，交给JIT内核计算得分
+            if arrays is None:
+                arrays = _EntityArrays.from_entities(entities)
+            count = len(entities)
+            name_lens = np.fromiter(map(len, arrays.names), dtype=np.float64, count=count)
+            prop_counts = np.fromiter((len(props or ()) for props in arrays.props),
+                                      dtype=np.float64, count=count)
+            alias_counts = np.fromiter(map(len, arrays.aliases), dtype=np.float64, count=count)
+            confidences = np.fromiter((float(props.get('confidence', 0)) for props in arrays.props),
+                                      dtype=np.float64, count=count)
+            name_weight = 0.1 if self._prefer_longer else 0.0
+            scores = _score_entities(name_lens, prop_counts, alias_counts, confidences, name_weight)
+            # argmax并列时取第一个，与max一致
+            return entities[int(np.argmax(scores))]
+        
+        # 评分标准（单次遍历维护当前最高分，并列时保留先出现的实体）
+        prefer_longer = self._prefer_longer
+        best_entity, best_score = entities[0], float('-inf')
         
         for entity in entities:
             score = 0.0
             
             # 名称长度评分（更长的名称可能更完整）
-            if self.fusion_rules['name_selection']['prefer_longer']:
+            if prefer_longer:
                 score += len(entity.name) * 0.1
             
-            # 属性完整性评分
-            if entity.properties:
-                score += len(entity.properties) * 0.2
+            # 属性完整性评分（空属性、无别名、无置信度时各项加0，结果不变）
+            properties = entity.properties
+            score += len(properties or ()) * 0.2
             
             # 别名数量评分
-            if entity.aliases:
-                score += len(entity.aliases) * 0.1
+            score += len(entity.aliases or ()) * 0.1
             
-            # 来源置信度评分（如果有的话）
-            if 'confidence' in entity.properties:
-                score += float(entity.properties.get('confidence', 0)) * 0.5
+            # 来源置信度评分（如果有的话），单次查找
+            score += float(properties.get('confidence', 0)) * 0.5
             
-            scores.append((entity, score))
+            # 选择得分最高的实体
+            if score > best_score:
+                best_entity, best_score = entity, score
         
-        # 选择得分最高的实体
-        best_entity = max(scores, key=lambda x: x[1])[0]
         return best_entity
     
     def fuse_entity_cluster(self, cluster: EntityCluster) -> FusionResult:
@@ -239,29 +407,34 @@ class EntityFusion:
     
     def _create_fused_entity(self, entities: List[Entity]) -> Entity:
         """创建融合后的实体"""
+        # 一次遍历收集名称、类型、属性和别名
+        names, types, property_lists, all_aliases = [], [], [], []
+        for entity in entities:
+            names.append(entity.name)
+            entity_type = entity.type
+            # 驻留后计数、比较可按指针进行，融合结果共享同一字符串；非str类型原样保留
+            types.append(sys.intern(entity_type) if type(entity_type) is str else entity_type)
+            property_lists.append(entity.properties)
+            if entity.aliases:
+                all_aliases.extend(entity.aliases)
+        
         # 选择最佳名称
-        fused_name = self._fuse_names([entity.name for entity in entities])
+        fused_name = self._fuse_names(names)
         
         # 确定实体类型
-        fused_type = self._fuse_types([entity.type for entity in entities])
+        fused_type = self._fuse_types(types)
         
         # 融合属性
-        fused_properties = self._fuse_properties([entity.properties for entity in entities])
+        fused_properties = self._fuse_properties(property_lists)
         
-        # 收集所有别名
-        all_aliases = []
-        for entity in entities:
-            if entity.aliases:
-                all_aliases.extend(entity.aliases)
-            # 将非主要名称也作为别名
-            if entity.name != fused_name:
-                all_aliases.append(entity.name)
+        # 将非主要名称也作为别名
+        all_aliases.extend(name for name in names if name != fused_name)
         
-        # 去重别名
-        fused_aliases = list(set(all_aliases))
+        # 去重别名（保持首次出现的顺序）
+        fused_aliases = list(dict.fromkeys(all_aliases))
         
         # 创建新的实体ID
-        fused_id = str(uuid.uuid4())
+        fused_id = self._new_id()
         
         return Entity(
             id=fused_id,
@@ -283,7 +456,7 @@ class EntityFusion:
             return unique_names[0]
         
         # 选择最长的非缩写名称
-        if self.fusion_rules['name_selection']['prefer_longer']:
+        if self._prefer_longer:
             # 过滤掉明显的缩写（全大写且较短）
             non_abbrev_names = [
                 name for name in unique_names 
@@ -293,33 +466,22 @@ class EntityFusion:
             if non_abbrev_names:
                 return max(non_abbrev_names, key=len)
         
-        # 选择最常见的名称
-        name_counts = {name: names.count(name) for name in unique_names}
-        return max(name_counts.items(), key=lambda x: x[1])[0]
+        # 选择最常见的名称（一次计数，并列时取先出现者）
+        return Counter(names).most_common(1)[0][0]
     
     def _fuse_types(self, types: List[str]) -> str:
         """融合实体类型"""
         if not types:
             return "Unknown"
         
-        # 去重并统计
-        type_counts = {}
-        for entity_type in types:
-            type_counts[entity_type] = type_counts.get(entity_type, 0) + 1
-        
-        strategy = self.fusion_rules['type_resolution']['strategy']
-        
-        if strategy == 'vote':
-            # 投票决定
-            return max(type_counts.items(), key=lambda x: x[1])[0]
+        strategy = self._type_strategy
         
-        elif strategy == 'most_specific':
-            # 选择最具体的类型（这里简化为选择最长的类型名）
-            return max(type_counts.keys(), key=len)
+        if strategy == 'most_specific':
+            # 选择最具体的类型（这里简化为选择最长的类型名），max取首个最长项，无需先去重计数
+            return max(types, key=len)
         
-        else:
-            # 默认投票
-            return max(type_counts.items(), key=lambda x: x[1])[0]
+        # 投票决定（其他策略默认投票），并列时取先出现者
+        return Counter(types).most_common(1)[0][0]
     
     def _fuse_properties(self, property_lists: List[Dict[str, any]]) -> Dict[str, any]:
         """融合实体属性"""
@@ -354,14 +516,15 @@ class EntityFusion:
         if len(values) == 1:
             return values[0]
         
-        # 处理不同类型的值
-        if all(isinstance(v, str) for v in values):
+        # 处理不同类型的值（只遍历一次取出现的类型集合，按子类关系判断以保持isinstance语义）
+        value_types = set(map(type, values))
+        if all(issubclass(t, str) for t in value_types):
             return self._fuse_string_values(values)
         
-        elif all(isinstance(v, (int, float)) for v in values):
+        elif all(issubclass(t, (int, float)) for t in value_types):
             return self._fuse_numeric_values(values)
         
-        elif all(isinstance(v, list) for v in values):
+        elif all(issubclass(t, list) for t in value_types):
             return self._fuse_list_values(values)
         
         else:
@@ -388,9 +551,8 @@ class EntityFusion:
         if len(unique_values) == 1:
             return unique_values[0]
         
-        # 选择最常见的值
-        value_counts = {value: values.count(value) for value in unique_values}
-        return max(value_counts.items(), key=lambda x: x[1])[0]
+        # 选择最常见的值（一次计数，并列时取先出现者）
+        return Counter(values).most_common(1)[0][0]
     
     def _fuse_numeric_values(self, values: List[float]) -> float:
         """融合数值"""
@@ -399,23 +561,15 @@ class EntityFusion:
     
     def _fuse_list_values(self, values: List[List]) -> List:
         """融合列表值"""
-        if self.fusion_rules['property_fusion']['merge_lists']:
+        if self._merge_lists:
             # 合并所有列表
-            merged = []
-            for lst in values:
-                merged.extend(lst)
+            merged = chain.from_iterable(values)
             
-            if self.fusion_rules['property_fusion']['deduplicate']:
+            if self._dedup:
                 # 去重（保持顺序）
-                seen = set()
-                deduped = []
-                for item in merged:
-                    if item not in seen:
-                        seen.add(item)
-                        deduped.append(item)
-                return deduped
+                return list(dict.fromkeys(merged))
             else:
-                return merged
+                return list(merged)
         else:
             # 选择最长的列表
             return max(values, key=len)
@@ -439,8 +593,10 @@ class EntityFusion:
         confidence_factors.append(('completeness', completeness_factor, 0.4))
         
         # 一致性因子（名称和类型的一致性）
-        name_consistency = len(set(entity.name for entity in source_entities)) == 1
-        type_consistency = len(set(entity.type for entity in source_entities)) == 1
+        # 遇到第一个不同值即返回，不构建集合
+        first_name, first_type = source_entities[0].name, source_entities[0].type
+        name_consistency = all(entity.name == first_name for entity in source_entities)
+        type_consistency = all(entity.type == first_type for entity in source_entities)
         consistency_factor = (name_consistency + type_consistency) / 2
         confidence_factors.append(('consistency', consistency_factor, 0.3))
         
@@ -453,46 +609,32 @@ class EntityFusion:
         # 聚类实体
         clusters = self.cluster_entities(entities)
         
-        # 融合每个聚类
-        fusion_results = []
-        for cluster in clusters:
-            result = self.fuse_entity_cluster(cluster)
-            fusion_results.append(result)
-        
-        return fusion_results
+        # 融合每个聚类（单个聚类的融合只需微秒级，顺序执行即可）
+        return [self.fuse_entity_cluster(cluster) for cluster in clusters]
     
     def get_fusion_statistics(self, fusion_results: List[FusionResult]) -> Dict[str, any]:
         """获取融合统计信息"""
-        stats = {
-            'total_fusions': len(fusion_results),
-            'single_entity_count': 0,
-            'multi_entity_count': 0,
-            'average_confidence': 0.0,
-            'high_confidence_count': 0,  # > 0.8
-            'source_distribution': defaultdict(int)
-        }
+        # 源实体数分布交给Counter在C层计数
+        source_counts = Counter(len(result.source_entities) for result in fusion_results)
         
+        # 置信度按顺序累加（与逐个相加的结果一致）
         total_confidence = 0.0
-        
+        high_confidence_count = 0  # > 0.8
         for result in fusion_results:
-            source_count = len(result.source_entities)
-            
-            if source_count == 1:
-                stats['single_entity_count'] += 1
-            else:
-                stats['multi_entity_count'] += 1
-            
-            stats['source_distribution'][source_count] += 1
-            
-            total_confidence += result.confidence
-            
-            if result.confidence > 0.8:
-                stats['high_confidence_count'] += 1
-        
-        if fusion_results:
-            stats['average_confidence'] = total_confidence / len(fusion_results)
+            confidence = result.confidence
+            total_confidence += confidence
+            if confidence > 0.8:
+                high_confidence_count += 1
         
-        return stats
+        single_entity_count = source_counts.get(1, 0)
+        return {
+            'total_fusions': len(fusion_results),
+            'single_entity_count': single_entity_count,
+            'multi_entity_count': len(fusion_results) - single_entity_count,
+            'average_confidence': total_confidence / len(fusion_results) if fusion_results else 0.0,
+            'high_confidence_count': high_confidence_count,
+            'source_distribution': dict(source_counts)
+        }
     
     def print_fusion_results(self, fusion_results: List[FusionResult]):
         """打印融合结果"""
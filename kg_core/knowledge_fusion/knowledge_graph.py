@@ -1,13 +1,15 @@
 """
 知识图谱模块 - 构建和管理完整的知识图谱
 """
-from typing import List, Dict, Tuple, Optional, Set, Any
+from typing import List, Dict, Tuple, Optional, Set, Any, NamedTuple
 from dataclasses import dataclass, field
+from array import array
 import json
 import networkx as nx
 import matplotlib.pyplot as plt
-from collections import defaultdict
+from collections import defaultdict, Counter
 import uuid
+import numpy as np
 import pandas as pd
 
 from ..entity_definition.entity_types import Entity
@@ -17,6 +19,18 @@ from .entity_fusion import EntityFusion, FusionResult
 from .relation_fusion import RelationFusion, RelationFusionResult
 from .conflict_resolution import ConflictResolver, Conflict
 from ..utils.visualization import font_manager, get_display_text, create_title
+from ..utils.serialization import dumps_json, loads_json
+from ..utils.performance import UnionFind
+
+try:
+    # 可选依赖：大图可视化时用稀疏拉普拉斯谱嵌入代替spring布局
+    from scipy.sparse.csgraph import connected_components, laplacian
+    from scipy.sparse.linalg import eigsh
+except ImportError:
+    eigsh = None
+
+# 复用同一个编码器：json.dumps带非默认参数时每次调用都会新建JSONEncoder
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
 
 
 @dataclass
@@ -31,9 +45,83 @@ class KnowledgeGraphStats:
     density: float
 
 
+class _GraphCSR(NamedTuple):
+    """无向邻接的CSR数组及边的端点列，节点序号与KnowledgeGraph._node_ids一致"""
+    und_indptr: np.ndarray
+    und_indices: np.ndarray
+    edge_heads: np.ndarray
+    edge_tails: np.ndarray
+
+
+def _gather_rows(indptr: np.ndarray, indices: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """一次取出CSR中多行的全部元素（np.repeat构造扁平下标，无Python循环）"""
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return indices[:0]
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return indices[offsets + np.arange(total)]
+
+
+def _component_spectral_coords(adjacency) -> np.ndarray:
+    """连通分量的谱坐标：归一化拉普拉斯第2、3小特征向量，按秩均匀映射到[-1, 1]"""
+    size = adjacency.shape[0]
+    if size <= 3:
+        angles = 2 * np.pi * np.arange(size) / size
+        return 0.5 * np.column_stack((np.cos(angles), np.sin(angles))) if size > 1 else np.zeros((1, 2))
+    
+    lap = laplacian(adjacency.astype(np.float64), normed=True)
+    if size <= KnowledgeGraph.DENSE_EIGEN_THRESHOLD:
+        _, vectors = np.linalg.eigh(lap.toarray())
+        coords = vectors[:, 1:3]
+    else:
+        # 平移-求逆模式：L + 1e-3·I正定，可直接分解，求最接近0的3个特征值
+        values, vectors = eigsh(lap.tocsc(), k=3, sigma=-1e-3, which='LM')
+        coords = vectors[:, np.argsort(values)[1:3]]
+    
+    # 特征向量的取值集中在0附近，换成秩坐标可保留相对顺序并把节点铺开
+    ranks = np.argsort(np.argsort(coords, axis=0, kind='stable'), axis=0, kind='stable')
+    return 2.0 * ranks / (size - 1) - 1.0
+
+
+def _spectral_layout(G: nx.Graph) -> Dict[Any, np.ndarray]:
+    """稀疏谱嵌入布局：每个弱连通分量单独嵌入，边长按sqrt(节点数)缩放后逐行排布"""
+    nodes = list(G)
+    adjacency = nx.to_scipy_sparse_array(G, nodelist=nodes, weight=None, format='csr')
+    # 对称化、去掉自环并把平行边计为1
+    adjacency = ((adjacency + adjacency.T) > 0).astype(np.int8).tocsr()
+    adjacency.setdiag(0)
+    adjacency.eliminate_zeros()
+    
+    component_count, labels = connected_components(adjacency, directed=False)
+    sizes = np.bincount(labels, minlength=component_count)
+    members_by_label = np.argsort(labels, kind='stable')
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    
+    # 按分量从大到小逐行放置，行宽取最大分量与整体面积中的较大者
+    positions = np.zeros((len(nodes), 2))
+    row_width = max(np.sqrt(sizes.max()), np.sqrt(len(nodes))) * 2.5
+    x = y = row_height = 0.0
+    for label in np.argsort(-sizes, kind='stable').tolist():
+        members = members_by_label[offsets[label]:offsets[label + 1]]
+        half = np.sqrt(len(members))
+        if x > 0 and x + 2 * half > row_width:
+            x, y, row_height = 0.0, y - row_height - 1.0, 0.0
+        coords = _component_spectral_coords(adjacency[members][:, members])
+        positions[members] = coords * half + (x + half, y - half)
+        x += 2 * half + 1.0
+        row_height = max(row_height, 2 * half)
+    
+    return dict(zip(nodes, positions))
+
+
 class KnowledgeGraph:
     """知识图谱"""
     
+    SPECTRAL_LAYOUT_THRESHOLD = 200  # 超过该节点数时spring布局改用谱嵌入
+    DENSE_EIGEN_THRESHOLD = 300      # 不超过该规模的分量直接做稠密特征分解
+    
     def __init__(self, ontology: Ontology = None):
         self.ontology = ontology or Ontology()
         self.entities: Dict[str, Entity] = {}
@@ -49,14 +137,52 @@ class KnowledgeGraph:
         self.entity_type_index: Dict[str, Set[str]] = defaultdict(set)
         self.relation_type_index: Dict[str, Set[str]] = defaultdict(set)
         self.entity_name_index: Dict[str, str] = {}
+        
+        # 邻居索引：随加边增量维护（值为保持插入顺序的dict作有序集合），get_neighbors直接读取
+        self._neighbors: Dict[str, Dict[str, None]] = {}
+        self._typed_neighbors: Dict[str, Dict[str, Dict[str, None]]] = {}
+        
+        # 邻接的列式存储：实体按添加顺序编号，边以int32列追加；
+        # 路径搜索、子图查询时按需构建CSR，图结构变化后在下次查询时重建
+        self._eid2idx: Dict[str, int] = {}
+        self._node_ids: List[str] = []
+        self._edge_heads = array('i')
+        self._edge_tails = array('i')
+        self._edge_relation_ids: List[str] = []
+        self._csr: Optional[_GraphCSR] = None
+        
+        # 增量统计：类型计数随增删维护，弱连通分量由并查集在加边时合并
+        self._entity_type_counts: Counter = Counter()
+        self._relation_type_counts: Counter = Counter()
+        self._components = UnionFind(0)
+        self._component_count = 0
+    
+    @staticmethod
+    def _discount(counter: Counter, key: str):
+        """计数减一，减到0时删除键（与按现有对象重新统计的结果一致）"""
+        counter[key] -= 1
+        if counter[key] <= 0:
+            del counter[key]
     
     def add_entity(self, entity: Entity):
         """添加实体"""
+        previous = self.entities.get(entity.id)
+        if previous is not None:
+            self._discount(self._entity_type_counts, previous.type)
+        self._entity_type_counts[entity.type] += 1
         self.entities[entity.id] = entity
         self.graph.add_node(entity.id, 
                            name=entity.name,
                            type=entity.type,
                            properties=entity.properties or {})
+        if entity.id not in self._eid2idx:
+            self._eid2idx[entity.id] = len(self._node_ids)
+            self._node_ids.append(entity.id)
+            self._neighbors[entity.id] = {}
+            self._typed_neighbors[entity.id] = {}
+            self._components.add()
+            self._component_count += 1
+            self._csr = None
         
         # 更新索引
         self.entity_type_index[entity.type].add(entity.id)
@@ -69,6 +195,10 @@ class KnowledgeGraph:
     
     def add_relation(self, relation: Relation):
         """添加关系"""
+        previous = self.relations.get(relation.id)
+        if previous is not None:
+            self._discount(self._relation_type_counts, previous.type)
+        self._relation_type_counts[relation.type] += 1
         self.relations[relation.id] = relation
         
         # 检查实体是否存在
@@ -83,6 +213,21 @@ class KnowledgeGraph:
                            properties=relation.properties or {},
                            confidence=relation.confidence)
         
+        head_id, tail_id = relation.head_entity_id, relation.tail_entity_id
+        self._neighbors[head_id][tail_id] = None
+        self._neighbors[tail_id][head_id] = None
+        self._typed_neighbors[head_id].setdefault(relation.type, {})[tail_id] = None
+        self._typed_neighbors[tail_id].setdefault(relation.type, {})[head_id] = None
+        
+        head = self._eid2idx[head_id]
+        tail = self._eid2idx[tail_id]
+        self._edge_heads.append(head)
+        self._edge_tails.append(tail)
+        self._edge_relation_ids.append(relation.id)
+        if self._components.union(head, tail):
+            self._component_count -= 1
+        self._csr = None
+        
         # 更新索引 
         self.relation_type_index[relation.type].add(relation.id)
     
@@ -124,66 +269,162 @@ class KnowledgeGraph:
         return [self.relations[rid] for rid in relation_ids]
     
     def get_neighbors(self, entity_id: str, relation_type: str = None) -> List[str]:
-        """获取邻居实体"""
-        neighbors = []
-        
-        if entity_id not in self.graph:
-            return neighbors
-        
-        # 出边邻居
-        for neighbor in self.graph.successors(entity_id):
-            edge_data = self.graph.get_edge_data(entity_id, neighbor)
-            for edge_key, edge_attrs in edge_data.items():
-                if relation_type is None or edge_attrs.get('relation_type') == relation_type:
-                    neighbors.append(neighbor)
-                    break
-        
-        # 入边邻居
-        for neighbor in self.graph.predecessors(entity_id):
-            edge_data = self.graph.get_edge_data(neighbor, entity_id)
-            for edge_key, edge_attrs in edge_data.items():
-                if relation_type is None or edge_attrs.get('relation_type') == relation_type:
-                    neighbors.append(neighbor)
-                    break
-        
-        return list(set(neighbors))  # 去重
+        """获取邻居实体（出边和入边邻居，已去重）"""
+        if relation_type is None:
+            return list(self._neighbors.get(entity_id, ()))
+        typed = self._typed_neighbors.get(entity_id)
+        return list(typed.get(relation_type, ())) if typed else []
+    
+    def _get_csr(self) -> _GraphCSR:
+        """返回当前图的CSR数组，图结构变化后在此惰性重建"""
+        if self._csr is None:
+            self._csr = self._build_csr()
+        return self._csr
+    
+    def _build_csr(self) -> _GraphCSR:
+        """由边列构建无向邻接CSR数组"""
+        node_count = len(self._node_ids)
+        heads = np.array(self._edge_heads, dtype=np.int32)
+        tails = np.array(self._edge_tails, dtype=np.int32)
+        
+        # 无向邻接：合并出入边，去掉平行边和自环（简单路径不会经过它们）
+        pairs = np.concatenate((heads.astype(np.int64) * node_count + tails,
+                                tails.astype(np.int64) * node_count + heads))
+        pairs = np.unique(pairs[np.concatenate((heads != tails, heads != tails))])
+        und_indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs // node_count, minlength=node_count), out=und_indptr[1:])
+        und_indices = (pairs % node_count).astype(np.int32)
+        
+        return _GraphCSR(und_indptr, und_indices, heads, tails)
+    
+    def _reset_adjacency(self):
+        """清空邻居索引、实体编号与边列"""
+        self._neighbors.clear()
+        self._typed_neighbors.clear()
+        self._eid2idx.clear()
+        self._node_ids.clear()
+        del self._edge_heads[:]
+        del self._edge_tails[:]
+        self._edge_relation_ids.clear()
+        self._components = UnionFind(0)
+        self._component_count = 0
+        self._csr = None
     
     def find_path(self, start_entity_id: str, end_entity_id: str, 
                   max_length: int = 3) -> List[List[str]]:
-        """找到两个实体之间的路径"""
-        try:
-            # 使用NetworkX找到所有简单路径
-            paths = list(nx.all_simple_paths(self.graph.to_undirected(), 
-                                           start_entity_id, end_entity_id,
-                                           cutoff=max_length))
-            return paths
-        except nx.NetworkXNoPath:
+        """找到两个实体之间的路径（忽略边方向，路径不重复经过实体，边数不超过max_length）"""
+        start = self._eid2idx.get(start_entity_id)
+        end = self._eid2idx.get(end_entity_id)
+        if start is None or end is None:
+            return []
+        if start == end:
+            return [[start_entity_id]]
+        if max_length < 1:
+            return []
+        
+        # 双向有界BFS：两端的距离既用于提前判断不可达，也用于剪枝半路径
+        csr = self._get_csr()
+        dist_start = self._bfs_distances(csr, start, max_length)
+        if dist_start[end] > max_length:
             return []
+        dist_end = self._bfs_distances(csr, end, max_length)
+        
+        # 长度为k的路径唯一地拆成 起点侧ceil(k/2) + 终点侧floor(k/2) 两段，在中间节点处拼接
+        left = self._half_paths(csr, start, end, (max_length + 1) // 2, dist_end, max_length, 0)
+        right = self._half_paths(csr, end, start, max_length // 2, dist_start, max_length, 1)
+        
+        paths = []
+        for middle, left_halves in left.items():
+            right_halves = right.get(middle)
+            if not right_halves:
+                continue
+            for left_half in left_halves:
+                left_length = len(left_half) - 1
+                left_nodes = set(left_half)
+                for right_half in right_halves:
+                    right_length = len(right_half) - 1
+                    if (left_length - 1 <= right_length <= left_length and
+                            left_length + right_length <= max_length and
+                            left_nodes.isdisjoint(right_half[:-1])):
+                        paths.append(left_half + right_half[-2::-1])
+        
+        paths.sort(key=len)
+        node_ids = self._node_ids
+        return [[node_ids[i] for i in path] for path in paths]
+    
+    @staticmethod
+    def _bfs_distances(csr: _GraphCSR, source: int, max_depth: int) -> np.ndarray:
+        """无向有界BFS，返回各节点到source的距离（超过max_depth的记为max_depth + 1）"""
+        dist = np.full(len(csr.und_indptr) - 1, max_depth + 1, dtype=np.int32)
+        dist[source] = 0
+        frontier = np.array([source], dtype=np.int32)
+        for depth in range(1, max_depth + 1):
+            reached = _gather_rows(csr.und_indptr, csr.und_indices, frontier)
+            frontier = np.unique(reached[dist[reached] > max_depth])
+            if frontier.size == 0:
+                break
+            dist[frontier] = depth
+        return dist
+    
+    @staticmethod
+    def _half_paths(csr: _GraphCSR, source: int, target: int, max_depth: int,
+                    dist_target: np.ndarray, max_length: int,
+                    slack: int) -> Dict[int, List[Tuple[int, ...]]]:
+        """从source出发枚举不超过max_depth的简单半路径，按末端节点分组
+        
+        末端节点到另一端的距离不超过 半路径长度 + slack 时才记录；
+        无法在max_length内到达另一端的分支直接剪掉，且不穿过target继续扩展。
+        """
+        indptr, indices = csr.und_indptr, csr.und_indices
+        halves: Dict[int, List[Tuple[int, ...]]] = defaultdict(list)
+        stack = [(source,)]
+        while stack:
+            path = stack.pop()
+            node = path[-1]
+            depth = len(path) - 1
+            if dist_target[node] <= depth + slack:
+                halves[node].append(path)
+            if depth >= max_depth or (depth > 0 and node == target):
+                continue
+            for child in indices[indptr[node]:indptr[node + 1]].tolist():
+                if child not in path and depth + 1 + dist_target[child] <= max_length:
+                    stack.append(path + (child,))
+        return halves
     
     def query_subgraph(self, entity_ids: List[str], depth: int = 1) -> 'KnowledgeGraph':
         """查询子图"""
-        subgraph_entities = set(entity_ids)
-        
-        # 扩展到指定深度
+        csr = self._get_csr()
+        eid2idx = self._eid2idx
+        visited = np.zeros(len(self._node_ids), dtype=bool)
+        frontier = np.unique(np.array([eid2idx[eid] for eid in entity_ids if eid in eid2idx],
+                                      dtype=np.int32))
+        visited[frontier] = True
+        
+        # 逐层扩展边界：一次取出边界节点的全部无向邻居，用visited掩码过滤
         for _ in range(depth):
-            new_entities = set()
-            for entity_id in subgraph_entities:
-                neighbors = self.get_neighbors(entity_id)
-                new_entities.update(neighbors)
-            subgraph_entities.update(new_entities)
+            reached = _gather_rows(csr.und_indptr, csr.und_indices, frontier)
+            frontier = np.unique(reached[~visited[reached]])
+            if frontier.size == 0:
+                break
+            visited[frontier] = True
         
         # 创建子图
         subgraph = KnowledgeGraph(self.ontology)
         
         # 添加实体
-        for entity_id in subgraph_entities:
-            if entity_id in self.entities:
-                subgraph.add_entity(self.entities[entity_id])
-        
-        # 添加关系
-        for relation in self.relations.values():
-            if (relation.head_entity_id in subgraph_entities and
-                relation.tail_entity_id in subgraph_entities):
+        node_ids = self._node_ids
+        for idx in np.flatnonzero(visited).tolist():
+            subgraph.add_entity(self.entities[node_ids[idx]])
+        
+        # 添加关系：两端都在子图中的边由掩码一次选出
+        edge_mask = visited[csr.edge_heads] & visited[csr.edge_tails]
+        edge_relation_ids = self._edge_relation_ids
+        selected = dict.fromkeys(edge_relation_ids[edge] for edge in np.flatnonzero(edge_mask).tolist())
+        for relation_id in selected:
+            relation = self.relations[relation_id]
+            head, tail = eid2idx.get(relation.head_entity_id), eid2idx.get(relation.tail_entity_id)
+            # 同一ID被重新添加过时，以当前关系的端点为准
+            if head is not None and tail is not None and visited[head] and visited[tail]:
                 subgraph.add_relation(relation)
         
         return subgraph
@@ -198,6 +439,8 @@ class KnowledgeGraph:
         self.entities.clear()
         self.entity_type_index.clear()
         self.entity_name_index.clear()
+        self._entity_type_counts.clear()
+        self._reset_adjacency()
         
         # 添加融合后的实体
         entity_id_mapping = {}  # 旧ID到新ID的映射
@@ -234,6 +477,7 @@ class KnowledgeGraph:
         # 清空当前关系
         self.relations.clear()
         self.relation_type_index.clear()
+        self._relation_type_counts.clear()
         self.graph.clear()
         
         # 重新添加实体到图中
@@ -313,30 +557,20 @@ class KnowledgeGraph:
         return validation_results
     
     def get_statistics(self) -> KnowledgeGraphStats:
-        """获取知识图谱统计信息"""
-        entity_types = defaultdict(int)
-        for entity in self.entities.values():
-            entity_types[entity.type] += 1
-        
-        relation_types = defaultdict(int)
-        for relation in self.relations.values():
-            relation_types[relation.type] += 1
-        
-        # 图统计
-        node_count = self.graph.number_of_nodes()
-        edge_count = self.graph.number_of_edges()
+        """获取知识图谱统计信息（读取增量维护的计数，O(类型数)）"""
+        node_count = len(self._node_ids)
+        edge_count = len(self._edge_heads)
         
         avg_degree = (2 * edge_count / node_count) if node_count > 0 else 0
-        connected_components = nx.number_weakly_connected_components(self.graph)
-        density = nx.density(self.graph)
+        density = edge_count / (node_count * (node_count - 1)) if node_count > 1 else 0
         
         return KnowledgeGraphStats(
             entity_count=len(self.entities),
             relation_count=len(self.relations),
-            entity_types=dict(entity_types),
-            relation_types=dict(relation_types),
+            entity_types=dict(self._entity_type_counts),
+            relation_types=dict(self._relation_type_counts),
             avg_degree=avg_degree,
-            connected_components=connected_components,
+            connected_components=self._component_count,
             density=density
         )
     
@@ -367,44 +601,37 @@ class KnowledgeGraph:
             'statistics': self.get_statistics().__dict__
         }
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(filepath, 'wb') as f:
+            f.write(dumps_json(data))
     
     def export_to_csv(self, entities_file: str, relations_file: str):
         """导出为CSV格式"""
-        # 导出实体
-        entity_data = []
-        for entity in self.entities.values():
-            entity_data.append({
-                'id': entity.id,
-                'name': entity.name,
-                'type': entity.type,
-                'aliases': ','.join(entity.aliases or []),
-                'properties': json.dumps(entity.properties or {}, ensure_ascii=False)
-            })
-        
-        entity_df = pd.DataFrame(entity_data)
+        # 按列构建DataFrame，避免逐行字典的键重复哈希
+        entities = list(self.entities.values())
+        entity_df = pd.DataFrame({
+            'id': [entity.id for entity in entities],
+            'name': [entity.name for entity in entities],
+            'type': [entity.type for entity in entities],
+            'aliases': [','.join(entity.aliases or []) for entity in entities],
+            'properties': [_encode_json(entity.properties or {}) for entity in entities]
+        })
         entity_df.to_csv(entities_file, index=False, encoding='utf-8')
         
-        # 导出关系
-        relation_data = []
-        for relation in self.relations.values():
-            relation_data.append({
-                'id': relation.id,
-                'type': relation.type,
-                'head_entity_id': relation.head_entity_id,
-                'tail_entity_id': relation.tail_entity_id,
-                'confidence': relation.confidence,
-                'properties': json.dumps(relation.properties or {}, ensure_ascii=False)
-            })
-        
-        relation_df = pd.DataFrame(relation_data)
+        relations = list(self.relations.values())
+        relation_df = pd.DataFrame({
+            'id': [relation.id for relation in relations],
+            'type': [relation.type for relation in relations],
+            'head_entity_id': [relation.head_entity_id for relation in relations],
+            'tail_entity_id': [relation.tail_entity_id for relation in relations],
+            'confidence': [relation.confidence for relation in relations],
+            'properties': [_encode_json(relation.properties or {}) for relation in relations]
+        })
         relation_df.to_csv(relations_file, index=False, encoding='utf-8')
     
     def load_from_json(self, filepath: str):
         """从JSON文件加载"""
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(filepath, 'rb') as f:
+            data = loads_json(f.read())
         
         # 清空当前数据
         self.clear()
@@ -453,13 +680,15 @@ class KnowledgeGraph:
         
         plt.figure(figsize=(12, 8))
         
-        # 选择布局
-        if layout == 'spring':
-            pos = nx.spring_layout(G, k=1, iterations=50)
-        elif layout == 'circular':
+        # 选择布局（spring布局每轮迭代O(N^2)，大图改用稀疏谱嵌入）
+        if layout == 'circular':
             pos = nx.circular_layout(G)
         elif layout == 'random':
             pos = nx.random_layout(G)
+        elif len(G) > self.SPECTRAL_LAYOUT_THRESHOLD and eigsh is not None:
+            pos = _spectral_layout(G)
+        elif layout == 'spring':
+            pos = nx.spring_layout(G, k=1, iterations=50)
         else:
             pos = nx.spring_layout(G)
         
@@ -547,6 +776,9 @@ class KnowledgeGraph:
         self.entity_type_index.clear()
         self.relation_type_index.clear()
         self.entity_name_index.clear()
+        self._entity_type_counts.clear()
+        self._relation_type_counts.clear()
+        self._reset_adjacency()
     
     def print_summary(self):
         """打印知识图谱摘要"""
@@ -1,10 +1,14 @@
 """
 相似度计算模块 - 提供各种相似度计算方法
 """
+import os
 import re
 import math
-from typing import List, Dict, Tuple, Set, Any
-from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Tuple, Set, FrozenSet, Any
+from collections import Counter, deque
+import numpy as np
 from Levenshtein import distance as levenshtein_distance
 import jieba
 
@@ -12,15 +16,23 @@ import jieba
 class SimilarityCalculator:
     """相似度计算器"""
     
-    def __init__(self):
-        self.stop_words = self._load_stop_words()
+    # 批量矩阵计算启用并行的规模阈值（n * n）
+    PARALLEL_THRESHOLD = 10_000
     
-    def _load_stop_words(self) -> Set[str]:
-        """加载停用词"""
-        return {
-            '的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一',
-            '个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有'
-        }
+    # 需要缓存的高代价相似度方法及启用缓存的最小代价（len1 * len2）
+    CACHED_METHODS = frozenset(('combined', 'levenshtein', 'lcs'))
+    CACHE_MIN_COST = 64
+    
+    # 停用词（类级共享，避免每次实例化重复构建）
+    _STOP_WORDS: FrozenSet[str] = frozenset((
+        '的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一',
+        '个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有'
+    ))
+    
+    @property
+    def stop_words(self) -> FrozenSet[str]:
+        """停用词"""
+        return self._STOP_WORDS
     
     def string_similarity(self, str1: str, str2: str, method: str = 'combined') -> float:
         """字符串相似度计算"""
@@ -30,6 +42,16 @@ class SimilarityCalculator:
         if str1 == str2:
             return 1.0
         
+        # 代价较高的方法走全局缓存（短字符串直接计算更快）
+        if method in self.CACHED_METHODS and len(str1) * len(str2) > self.CACHE_MIN_COST:
+            if str2 < str1:
+                str1, str2 = str2, str1
+            return _cached_string_sim(str1, str2, method)
+        
+        return self._compute_string_similarity(str1, str2, method)
+    
+    def _compute_string_similarity(self, str1: str, str2: str, method: str) -> float:
+        """按方法分派计算字符串相似度"""
         if method == 'levenshtein':
             return self._levenshtein_similarity(str1, str2)
         elif method == 'jaccard':
@@ -171,30 +193,32 @@ class SimilarityCalculator:
         keys1 = set(structure1.keys())
         keys2 = set(structure2.keys())
         
-        key_intersection = len(keys1 & keys2)
-        key_union = len(keys1 | keys2)
-        key_similarity = key_intersection / key_union if key_union > 0 else 0.0
+        common_keys = keys1 & keys2
+        
+        # 键完全不相交时无需比较值
+        if not common_keys:
+            return 0.0
+        
+        key_similarity = len(common_keys) / len(keys1 | keys2)
         
         # 比较值的相似度
-        value_similarities = []
-        common_keys = keys1 & keys2
+        value_similarity_sum = 0.0
         
         for key in common_keys:
             val1, val2 = structure1[key], structure2[key]
             
-            if isinstance(val1, str) and isinstance(val2, str):
+            if val1 == val2:
+                val_sim = 1.0
+            elif isinstance(val1, str) and isinstance(val2, str):
                 val_sim = self.string_similarity(val1, val2)
             elif isinstance(val1, (list, set)) and isinstance(val2, (list, set)):
                 val_sim = self._list_similarity(list(val1), list(val2))
-            elif val1 == val2:
-                val_sim = 1.0
             else:
                 val_sim = 0.0
             
-            value_similarities.append(val_sim)
+            value_similarity_sum += val_sim
         
-        avg_value_similarity = sum(value_similarities) / len(value_similarities) \
-                              if value_similarities else 0.0
+        avg_value_similarity = value_similarity_sum / len(common_keys)
         
         # 综合相似度
         return (key_similarity * 0.5 + avg_value_similarity * 0.5)
@@ -289,10 +313,60 @@ class SimilarityCalculator:
     def batch_similarity_matrix(self, items: List[str], 
                                method: str = 'combined') -> List[List[float]]:
         """批量计算相似度矩阵"""
+        if method == 'cosine':
+            return self._batch_cosine_matrix(items)
+        
         n = len(items)
         matrix = [[0.0] * n for _ in range(n)]
         
-        for i in range(n):
+        # 小规模输入直接顺序计算，避免线程池开销
+        if n * n < self.PARALLEL_THRESHOLD:
+            self._compute_row_range(items, method, 0, n, matrix)
+            return matrix
+        
+        # 按行分块并行计算（Levenshtein C扩展计算时会释放GIL）
+        workers = os.cpu_count() or 1
+        tile = max(1, n // workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._compute_row_range, items, method,
+                                       start, min(start + tile, n), matrix)
+                       for start in range(0, n, tile)]
+            for future in futures:
+                future.result()
+        
+        return matrix
+    
+    def _batch_cosine_matrix(self, items: List[str]) -> List[List[float]]:
+        """以字符频率矩阵一次矩阵乘法计算全部余弦相似度"""
+        n = len(items)
+        if n == 0:
+            return []
+        
+        lowered = [item.lower() for item in items]
+        vocab: Dict[str, int] = {}
+        for text in lowered:
+            for char in text:
+                vocab.setdefault(char, len(vocab))
+        
+        freq = np.zeros((n, max(len(vocab), 1)), dtype=np.float64)
+        for row, text in enumerate(lowered):
+            for char, count in Counter(text).items():
+                freq[row, vocab[char]] = count
+        
+        norms = np.linalg.norm(freq, axis=1)
+        # 空字符串的模长为0，与任何项的相似度都记为0
+        safe_norms = np.where(norms > 0, norms, 1.0)
+        cos = (freq @ freq.T) / np.outer(safe_norms, safe_norms)
+        np.clip(cos, 0.0, 1.0, out=cos)
+        np.fill_diagonal(cos, 1.0)
+        
+        return cos.tolist()
+    
+    def _compute_row_range(self, items: List[str], method: str,
+                           start: int, stop: int, matrix: List[List[float]]):
+        """计算相似度矩阵中[start, stop)行的上三角部分"""
+        n = len(items)
+        for i in range(start, stop):
             for j in range(i, n):
                 if i == j:
                     similarity = 1.0
@@ -301,11 +375,13 @@ class SimilarityCalculator:
                 
                 matrix[i][j] = similarity
                 matrix[j][i] = similarity  # 对称矩阵
-        
-        return matrix
     
     def find_duplicates(self, items: List[str], threshold: float = 0.8) -> List[List[int]]:
-        """找出重复项（相似度超过阈值的项）"""
+        """找出重复项（相似度超过阈值的项）
+        
+        每组以尚未归组的项为锚点，只收集与锚点直接相似的项；需要按相似关系传递合并时
+        使用clustering_by_similarity。
+        """
         similarity_matrix = self.batch_similarity_matrix(items)
         n = len(items)
         
@@ -324,8 +400,6 @@ class SimilarityCalculator:
             
             if len(duplicate_group) > 1:
                 duplicates.append(duplicate_group)
-            
-            visited.add(i)
         
         return duplicates
     
@@ -335,22 +409,42 @@ class SimilarityCalculator:
         similarity_matrix = self.batch_similarity_matrix(items)
         n = len(items)
         
-        clusters = []
-        visited = set()
+        if n == 0:
+            return []
         
-        def dfs(node: int, cluster: List[int]):
-            visited.add(node)
-            cluster.append(node)
-            
-            for neighbor in range(n):
-                if (neighbor not in visited and 
-                    similarity_matrix[node][neighbor] >= threshold):
-                    dfs(neighbor, cluster)
+        # 预先计算布尔邻接矩阵
+        adjacency = np.asarray(similarity_matrix) >= threshold
+        np.fill_diagonal(adjacency, False)
         
+        clusters = []
+        visited = np.zeros(n, dtype=bool)
+        
+        # 迭代式BFS，避免大规模输入时递归过深
         for i in range(n):
-            if i not in visited:
-                cluster = []
-                dfs(i, cluster)
-                clusters.append(cluster)
+            if visited[i]:
+                continue
+            
+            visited[i] = True
+            cluster = [i]
+            queue = deque([i])
+            while queue:
+                node = queue.popleft()
+                neighbors = np.flatnonzero(adjacency[node] & ~visited)
+                if neighbors.size:
+                    visited[neighbors] = True
+                    neighbors = neighbors.tolist()
+                    queue.extend(neighbors)
+                    cluster.extend(neighbors)
+            
+            clusters.append(cluster)
         
-        return clusters
\ No newline at end of file
+        return clusters
+
+
+_DEFAULT_CALCULATOR = SimilarityCalculator()
+
+
+@lru_cache(maxsize=100_000)
+def _cached_string_sim(str1: str, str2: str, method: str) -> float:
+    """带LRU缓存的字符串相似度（调用方保证str1 <= str2）"""
+    return _DEFAULT_CALCULATOR._compute_string_similarity(str1, str2, method)
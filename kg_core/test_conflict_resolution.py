@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试冲突解决历史的累计统计与遍历历史的结果一致
+"""
+
+import sys
+import os
+import random
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kg_core.knowledge_fusion.conflict_resolution import ConflictResolver, Conflict, ConflictType
+
+
+def _assert_history_statistics(resolver: ConflictResolver):
+    """累计值与遍历conflict_history重新计算的统计一致"""
+    history = list(resolver.conflict_history)
+    fast = resolver.get_conflict_statistics(resolver.conflict_history)
+    scan = resolver.get_conflict_statistics(history)
+    assert fast['total_conflicts'] == scan['total_conflicts']
+    assert fast['by_type'] == scan['by_type']
+    assert fast['resolved_count'] == scan['resolved_count']
+    assert fast['high_confidence_resolutions'] == scan['high_confidence_resolutions']
+    assert abs(fast['average_resolution_confidence'] - scan['average_resolution_confidence']) < 1e-9
+
+
+def test_history_statistics_after_re_resolve():
+    """同一冲突先以高置信度、再以中等置信度解决"""
+    resolver = ConflictResolver()
+    conflict = Conflict("name_conflict_e1", ConflictType.ENTITY_NAME_CONFLICT,
+                        "实体 e1 有多个不同的名称", ["张三", "张三丰"], [1.0, 0.6])
+    resolver.resolve_conflict(conflict, 'highest_confidence')
+    _assert_history_statistics(resolver)
+    resolver.resolve_conflict(conflict, 'longest_name')
+    _assert_history_statistics(resolver)
+    assert resolver.get_conflict_statistics(resolver.conflict_history)['high_confidence_resolutions'] == 0
+
+
+def test_history_statistics_with_eviction():
+    """随机重新解决并超出max_history，累计值始终与遍历结果一致"""
+    rnd = random.Random(0)
+    resolver = ConflictResolver(max_history=5)
+    strategies = {
+        ConflictType.ENTITY_NAME_CONFLICT: ['highest_confidence', 'most_frequent', 'longest_name'],
+        ConflictType.PROPERTY_VALUE_CONFLICT: ['highest_confidence', 'vote', 'average_numeric'],
+    }
+    conflicts = []
+    for i in range(8):
+        conflict_type = rnd.choice(list(strategies))
+        items = [rnd.randint(0, 3) for _ in range(rnd.randint(2, 4))]
+        conflicts.append(Conflict(f"conflict_{i}", conflict_type, "", items,
+                                  [rnd.random() for _ in items]))
+    for _ in range(200):
+        conflict = rnd.choice(conflicts)
+        resolver.resolve_conflict(conflict, rnd.choice(strategies[conflict.conflict_type]))
+        _assert_history_statistics(resolver)
+
+
+if __name__ == "__main__":
+    test_history_statistics_after_re_resolve()
+    test_history_statistics_with_eviction()
+    print("✅ 冲突历史统计测试通过")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试实体抽取在不同正则后端下结果一致
+"""
+
+import sys
+import os
+
+import jieba
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kg_core.knowledge_extraction import entity_extractor
+from kg_core.knowledge_extraction.entity_extractor import EntityExtractor, _pos_segment
+
+# 全角数字与全角空格
+FULL_WIDTH_TEXT = "张三教授在２０２３年购买了iPhone　１５，并在Windows　１１上安装了数据分析软件。"
+
+
+def _extract_with_backend(re2_module, text: str):
+    """以指定的RE2模块（None表示只用re）编译模式后抽取实体"""
+    saved_re2, saved_cache = entity_extractor.re2, dict(entity_extractor._PATTERN_CACHE)
+    entity_extractor.re2 = re2_module
+    entity_extractor._PATTERN_CACHE.clear()
+    try:
+        extractor = EntityExtractor()
+        return [(entity.text, entity.type, entity.start_pos, entity.end_pos)
+                for entity in extractor.extract_by_patterns(text)]
+    finally:
+        entity_extractor.re2 = saved_re2
+        entity_extractor._PATTERN_CACHE.clear()
+        entity_extractor._PATTERN_CACHE.update(saved_cache)
+
+
+def test_full_width_text_matches_across_backends():
+    """全角输入在re与RE2（已安装时）后端下抽取结果相同"""
+    expected = _extract_with_backend(None, FULL_WIDTH_TEXT)
+    assert ("iPhone　１５", "Product", 13, 22) in expected
+    assert ("Windows　１１", "Product", 25, 35) in expected
+
+    try:
+        import re2
+    except ImportError:
+        return
+    assert _extract_with_backend(re2, FULL_WIDTH_TEXT) == expected
+
+
+def test_pos_segment_follows_user_dictionary():
+    """add_word/del_word之后分词缓存不再返回旧结果"""
+    text = "小明在蓝鲸星云科技工作"
+    word = "蓝鲸星云科技"
+    before = _pos_segment(text)
+    assert (word, "nt") not in before
+    jieba.add_word(word, tag="nt")
+    try:
+        assert (word, "nt") in _pos_segment(text)
+    finally:
+        jieba.del_word(word)
+    assert word not in [segment for segment, _ in _pos_segment(text)]
+
+
+def test_indicator_changes_take_effect():
+    """修改公开的指示词集合后，词性推断使用新的指示词"""
+    extractor = EntityExtractor()
+    assert extractor._pos_to_entity_type("某某研究所", "n") is None
+    extractor.org_indicators.add("研究所")
+    assert extractor._pos_to_entity_type("某某研究所", "n") == "Organization"
+    extractor.org_indicators = set()
+    assert extractor._pos_to_entity_type("某某公司", "n") is None
+
+
+if __name__ == "__main__":
+    test_full_width_text_matches_across_backends()
+    test_pos_segment_follows_user_dictionary()
+    test_indicator_changes_take_effect()
+    print("✅ 实体抽取后端一致性测试通过")
@@ -0,0 +1,75 @@
+"""
+性能工具模块 - 各模块共用的dataclass slots参数、并行度换算、JIT数值内核和并查集
+"""
+import os
+import sys
+from typing import Optional
+
+try:
+    # 可选依赖：用于JIT编译数值内核
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Python 3.10+ 的dataclass支持slots，大量实例更省内存，属性读取更快
+DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+def resolve_n_jobs(n_jobs: Optional[int]) -> int:
+    """按joblib约定把n_jobs换算为工作进程/线程数
+    
+    None为全部CPU，n_jobs <= 0表示 CPU数 + 1 + n_jobs（-1即全部CPU），结果至少为1。
+    """
+    cpu_count = os.cpu_count() or 1
+    if n_jobs is None:
+        n_jobs = cpu_count
+    elif n_jobs <= 0:
+        n_jobs = cpu_count + 1 + n_jobs
+    return max(n_jobs, 1)
+
+
+def _mean_f64_kernel(values):
+    """顺序累加求均值（与Python内置sum的累加顺序一致）"""
+    total = 0.0
+    for i in range(values.shape[0]):
+        total += values[i]
+    return total / values.shape[0]
+
+
+# 一维float64数组求均值的JIT内核；未安装numba时为None，调用方自行回退到sum/len
+mean_f64 = njit(cache=True)(_mean_f64_kernel) if njit is not None else None
+
+
+class UnionFind:
+    """并查集（路径压缩 + 按秩合并），用于实体聚类与连通分量计数"""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.rank = [0] * size
+
+    def add(self) -> int:
+        """追加一个单元素集合，返回其下标"""
+        index = len(self.parent)
+        self.parent.append(index)
+        self.rank.append(0)
+        return index
+
+    def find(self, x: int) -> int:
+        """查找根节点，沿途把节点指向祖父节点压缩路径"""
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x: int, y: int) -> bool:
+        """合并x与y所在的集合，秩小的根挂到秩大的根下；返回是否发生了合并"""
+        root_x, root_y = self.find(x), self.find(y)
+        if root_x == root_y:
+            return False
+        if self.rank[root_x] < self.rank[root_y]:
+            root_x, root_y = root_y, root_x
+        self.parent[root_y] = root_x
+        if self.rank[root_x] == self.rank[root_y]:
+            self.rank[root_x] += 1
+        return True
@@ -0,0 +1,60 @@
+"""
+序列化工具模块 - JSON导出/加载（orjson可用时优先使用，结果与标准库json一致）
+"""
+import json
+import math
+import re
+from typing import Any
+
+try:
+    # 可选依赖：orjson序列化/反序列化更快
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# 19位及以上的数字串可能超出64位整数范围，orjson.loads会把它读成浮点数
+_WIDE_NUMBER = re.compile(rb'\d{19,}')
+
+
+def _has_non_finite(value: Any) -> bool:
+    """数据中是否含NaN/Infinity（orjson写成null，json写成NaN/Infinity）"""
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, float):
+            if not math.isfinite(item):
+                return True
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return False
+
+
+def dumps_json(data: Any) -> bytes:
+    """序列化为UTF-8编码、缩进2格的JSON，等价于json.dumps(data, ensure_ascii=False, indent=2)
+
+    orjson无法原样表示的数据（超过64位的整数、NaN/Infinity、不支持的类型）退回标准库json。
+    """
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(data, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            encoded = None
+        # 输出中的null可能来自NaN/Infinity，只有出现null时才需要遍历确认
+        if encoded is not None and (b'null' not in encoded or not _has_non_finite(data)):
+            return encoded
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def loads_json(raw: bytes) -> Any:
+    """解析JSON字节串；含NaN/Infinity或超宽整数时退回标准库json，与json.loads结果一致"""
+    if orjson is not None and _WIDE_NUMBER.search(raw) is None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
@@ -4,13 +4,54 @@
 import matplotlib.pyplot as plt
 import matplotlib
 import platform
+import re
 import warnings
+from matplotlib.font_manager import fontManager
 warnings.filterwarnings('ignore')
 
+# 系统可用字体名称（模块加载时缓存一次）
+_AVAILABLE_FONTS = frozenset(f.name for f in fontManager.ttflist)
+
 
 class ChineseFontManager:
     """中文字体管理器"""
     
+    # 简单的中文到英文映射
+    CHINESE_TO_ENGLISH_MAP = {
+        '知识图谱可视化': 'Knowledge Graph Visualization',
+        '实体': 'entities',
+        '关系': 'relations',
+        '张三': 'Zhang San',
+        '李四': 'Li Si',
+        '王五': 'Wang Wu',
+        '北京大学': 'Peking University',
+        '腾讯公司': 'Tencent',
+        '阿里巴巴': 'Alibaba',
+        '苹果公司': 'Apple Inc',
+        '微软公司': 'Microsoft',
+        '谷歌公司': 'Google',
+        '上海交通大学': 'SJTU',
+        '斯坦福大学': 'Stanford',
+        '中国科学院': 'CAS',
+        '深圳市': 'Shenzhen',
+        '北京市': 'Beijing',
+        '杭州市': 'Hangzhou',
+        '上海市': 'Shanghai',
+        '马云': 'Jack Ma',
+        '比尔·盖茨': 'Bill Gates',
+        '史蒂夫·乔布斯': 'Steve Jobs',
+        '微信': 'WeChat',
+        'iPhone': 'iPhone',
+        '淘宝': 'Taobao',
+        'Windows': 'Windows'
+    }
+    
+    # 按长度降序组合为单个正则，保证长词优先匹配
+    _C2E_PATTERN = re.compile('|'.join(
+        sorted(map(re.escape, CHINESE_TO_ENGLISH_MAP), key=len, reverse=True)))
+    _CJK_PATTERN = re.compile('[\u4e00-\u9fff]')
+    _UNSAFE_CHAR_PATTERN = re.compile(r'[^\w .,()\[\]]')
+    
     def __init__(self):
         self.font_configured = False
         self.available_font = None
@@ -65,34 +106,9 @@ class ChineseFontManager:
     
     def test_font(self, font_name: str) -> bool:
         """测试字体是否可用"""
-        try:
-            import warnings
-            from matplotlib.font_manager import fontManager
-            
-            # 抑制所有字体相关警告
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                
-                # 简单测试：检查字体是否在系统字体列表中
-                available_fonts = [f.name for f in fontManager.ttflist]
-                if font_name in available_fonts:
-                    return True
-                
-                # 备用测试：尝试使用字体创建图像
-                fig, ax = plt.subplots(figsize=(1, 1))
-                try:
-                    # 设置字体并创建文本
-                    ax.text(0.5, 0.5, 'Test 测试', fontfamily=font_name, fontsize=10)
-                    
-                    # 如果没有异常，认为字体可用
-                    plt.close(fig)
-                    return True
-                except:
-                    plt.close(fig)
-                    return False
-                
-        except Exception:
-            return False
+        # 仅检查字体是否在系统字体列表中；用字体创建图像的备用测试
+        # 并不可靠（matplotlib找不到字体时会静默回退），因此已移除
+        return font_name in _AVAILABLE_FONTS
     
     def configure_matplotlib(self, font_name: str):
         """配置matplotlib字体"""
@@ -117,45 +133,14 @@ class ChineseFontManager:
     
     def chinese_to_english(self, text: str) -> str:
         """简单的中文到英文映射"""
-        chinese_to_english_map = {
-            '知识图谱可视化': 'Knowledge Graph Visualization',
-            '实体': 'entities',
-            '关系': 'relations',
-            '张三': 'Zhang San',
-            '李四': 'Li Si',
-            '王五': 'Wang Wu',
-            '北京大学': 'Peking University',
-            '腾讯公司': 'Tencent',
-            '阿里巴巴': 'Alibaba',
-            '苹果公司': 'Apple Inc',
-            '微软公司': 'Microsoft',
-            '谷歌公司': 'Google',
-            '上海交通大学': 'SJTU',
-            '斯坦福大学': 'Stanford',
-            '中国科学院': 'CAS',
-            '深圳市': 'Shenzhen',
-            '北京市': 'Beijing',
-            '杭州市': 'Hangzhou',
-            '上海市': 'Shanghai',
-            '马云': 'Jack Ma',
-            '比尔·盖茨': 'Bill Gates',
-            '史蒂夫·乔布斯': 'Steve Jobs',
-            '微信': 'WeChat',
-            'iPhone': 'iPhone',
-            '淘宝': 'Taobao',
-            'Windows': 'Windows'
-        }
-        
-        # 替换已知的中文词汇
-        result = text
-        for chinese, english in chinese_to_english_map.items():
-            result = result.replace(chinese, english)
+        # 一次扫描替换所有已知的中文词汇
+        result = self._C2E_PATTERN.sub(
+            lambda match: self.CHINESE_TO_ENGLISH_MAP[match.group(0)], text)
         
         # 如果还有中文字符，尝试简化处理
-        if any('\u4e00' <= char <= '\u9fff' for char in result):
+        if self._CJK_PATTERN.search(result):
             # 保留英文和数字，其他字符用_代替
-            result = ''.join(char if char.isalnum() or char in ' .,()[]' else '_' 
-                           for char in result)
+            result = self._UNSAFE_CHAR_PATTERN.sub('_', result)
         
         return result
 